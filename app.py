@@ -1,22 +1,52 @@
 #app.py
 
-from flask import Flask, request, jsonify, Blueprint
-from flask_restful import Api, Resource, reqparse
+from flask import Flask, Response, request, jsonify, Blueprint, stream_with_context, send_file
+from flask_restful import Api, Resource, reqparse, inputs
 from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from models import db, User, Product, Category, Order, OrderItem, Cart, CartItem, Invoice, Analytics, OrderStatusEnum
 from jwt_helpers import admin_required
+from role_cache import role_for
 from flask_migrate import Migrate
 from datetime import timedelta, datetime
-from auth import auth_bp 
+from auth import auth_bp, jwt
 from flask_cors import CORS
+from counters import view_counter
+from sqlite_tuning import apply_sqlite_profile
+from routing import configure_read_write_split
+from metrics import registry
+import role_cache
+import blocklist
+import passwords
+import catalog_cache
+import instrumentation
+import seed_bulk
+from rollups import top_products, daily_totals, product_history, MAX_WINDOW_DAYS, MAX_TOP_N
+from checkout import place_order
+from carts import apply_cart_operations, clear_cart, touch_cart, cart_sweeper
+from errors import RequestError
+from jobs import job_queue
+from invoices import ensure_document, DOCUMENT_FORMATS, MIMETYPES as DOCUMENT_MIMETYPES, DOCUMENT_MAX_AGE
+import invoices
+from pagination import keyset_page, clamp_limit, encode_cursor, decode_cursor, InvalidCursor
+from conditional import conditional_get, row_exists
+from search import search_products, include_object, MAX_OFFSET
+from serializers import product_schema, category_schema, order_schema, json_response, stream_rows
+from exports import export_statement, export_orders, parse_bound, EXPORT_FORMATS, MIMETYPES
+from urllib.parse import urlencode
 import os
 
 # Initialize database and migration
 db = db  # Importing from models
-migrate = Migrate()
+migrate = Migrate(include_object=include_object)
 
-def create_app():
+def _next_page_query(next_cursor):
+    # Preserve the caller's filters and swap in the new cursor
+    args = request.args.to_dict()
+    args['cursor'] = next_cursor
+    return urlencode(args)
+
+def create_app(config=None):
     app = Flask(__name__)
 
     db_path = os.path.join(os.path.abspath(os.getcwd()), "beautyshop.sqlite")
@@ -24,11 +54,31 @@ def create_app():
     app.config['JWT_SECRET_KEY'] = 'your_jwt_secret_key'  # Change this to a random secret
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=5)
     app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=15)
+    # Let flask-restful re-raise JWT errors so flask-jwt-extended answers revoked or
+    # expired tokens with 401 instead of a generic 500
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+
+    # Overrides, e.g. a temporary database for benchmarks
+    if config:
+        app.config.update(config)
+    app.config.setdefault('ORDER_EXPORT_BATCH_SIZE', 1000)  # Orders per fetch/flush in admin exports
 
     # Initialize extensions
+    configure_read_write_split(app)  # Must run before db.init_app creates the engines
     db.init_app(app)
-    JWTManager(app)
+    apply_sqlite_profile(app)  # WAL, busy_timeout, cache and mmap pragmas per connection
+    instrumentation.init_app(app, db)  # Per-endpoint query count, SQL/JSON time and size on /metrics
+    jwt.init_app(app)  # The manager from auth.py carries the blocklist loader
+    blocklist.init_app(app)
+    passwords.init_app(app)
+    catalog_cache.init_app(app)
     migrate.init_app(app, db)
+    view_counter.init_app(app)
+    role_cache.init_app(app)
+    seed_bulk.init_app(app)  # flask seed-bulk
+    cart_sweeper.init_app(app)  # Background purge of abandoned carts, flask sweep-carts
+    job_queue.init_app(app)  # Outbox worker pool for post-checkout work, flask run-jobs
+    invoices.init_app(app)  # Where rendered invoice documents are cached
     CORS(app)
 
     # Parser to handle incoming JSON data for product creation and updates
@@ -48,6 +98,36 @@ def create_app():
         help="Invalid status. Allowed values are: {}".format(", ".join([status.value for status in OrderStatusEnum]))
     )
 
+    order_export_parser = reqparse.RequestParser()
+    order_export_parser.add_argument('format', type=str, default='ndjson', choices=EXPORT_FORMATS, location='args',
+                                     help='format must be one of: ' + ', '.join(EXPORT_FORMATS))
+    order_export_parser.add_argument('start', type=parse_bound, location='args', help='start must be an ISO 8601 date or datetime')
+    order_export_parser.add_argument('end', type=parse_bound, location='args', help='end must be an ISO 8601 date or datetime')
+    order_export_parser.add_argument('cursor', type=str, location='args')
+
+    # Page size, cursor and status filter for a customer's order history
+    order_history_parser = reqparse.RequestParser()
+    order_history_parser.add_argument('limit', type=int, location='args', help='Limit must be an integer')
+    order_history_parser.add_argument('cursor', type=str, location='args')
+    order_history_parser.add_argument('status', type=lambda value: OrderStatusEnum(value.upper()), location='args',
+                                      help='status must be one of: ' + ', '.join(s.value for s in OrderStatusEnum))
+
+    # Query-string filters and cursor for the product listing
+    product_list_parser = reqparse.RequestParser()
+    product_list_parser.add_argument('limit', type=int, location='args', help='Limit must be an integer')
+    product_list_parser.add_argument('cursor', type=str, location='args')
+    product_list_parser.add_argument('category_id', type=int, location='args', help='Category ID must be an integer')
+    product_list_parser.add_argument('min_price', type=float, location='args', help='Minimum price must be a number')
+    product_list_parser.add_argument('max_price', type=float, location='args', help='Maximum price must be a number')
+    product_list_parser.add_argument('in_stock', type=inputs.boolean, location='args', help='in_stock must be true or false')
+
+    product_search_parser = reqparse.RequestParser()
+    product_search_parser.add_argument('q', type=str, required=True, location='args', help='Search text is required')
+    product_search_parser.add_argument('limit', type=int, location='args', help='Limit must be an integer')
+    product_search_parser.add_argument('cursor', type=str, location='args')
+    product_search_parser.add_argument('prefix', type=inputs.boolean, default=True, location='args',
+                                       help='prefix must be true or false')
+
 
     ### Product Management for Admin ###
     class AdminProductResource(Resource):
@@ -77,6 +157,7 @@ def create_app():
             db.session.add(new_product)
             try:
                 db.session.commit()
+                catalog_cache.invalidate('products')
                 return {"message": "Product created successfully", "product": new_product.to_dict()}
             except IntegrityError:
                 db.session.rollback()
@@ -99,6 +180,7 @@ def create_app():
 
 
             db.session.commit()
+            catalog_cache.invalidate('products')
             return jsonify({"message": "Product updated successfully", "product": product.to_dict()})
 
         @admin_required
@@ -109,6 +191,7 @@ def create_app():
 
             db.session.delete(product)
             db.session.commit()
+            catalog_cache.invalidate('products')
             return {"message": "Product deleted successfully"}, 200
 
     ### Order Management for Admin ###
@@ -120,9 +203,8 @@ def create_app():
                 order = Order.query.get_or_404(order_id)
                 return jsonify(order.to_dict())
             else:
-                # Retrieve all orders
-                orders = Order.query.all()
-                return jsonify([order.to_dict() for order in orders])
+                # Stream all orders straight from result rows; memory stays flat however many there are
+                return stream_rows(order_schema, order_schema.select().order_by(Order.id))
 
         @admin_required
         def patch(self, order_id):
@@ -151,6 +233,22 @@ def create_app():
                 db.session.rollback()  # Rollback in case of an error
                 return {"message": f"An error occurred: {str(e)}"}, 500
             
+    class AdminOrderExportResource(Resource):
+        @admin_required
+        def get(self):
+            # Stream orders with their items and invoices for finance, created_at in [start, end)
+            args = order_export_parser.parse_args()
+            try:
+                statement = export_statement(args['start'], args['end'], args['cursor'])
+            except InvalidCursor:
+                return {"message": "Invalid cursor"}, 400
+
+            fmt = args['format']
+            body = export_orders(statement, fmt, app.config['ORDER_EXPORT_BATCH_SIZE'])
+            response = Response(stream_with_context(body), mimetype=MIMETYPES[fmt])
+            response.headers['Content-Disposition'] = f'attachment; filename="orders.{fmt}"'
+            return response
+
     category_bp = Blueprint('categories', __name__)
     category = Api(category_bp)
             
@@ -171,9 +269,11 @@ def create_app():
             new_category = Category(name=name, description=description)
             db.session.add(new_category)
             db.session.commit()
+            catalog_cache.invalidate('categories')
             return {"message": "Category created successfully", "category": new_category.to_dict()}
         
         @jwt_required()
+        @conditional_get('categories', exists=row_exists(Category, 'category_id'))
         def get(self, category_id=None):
             if category_id:
                 # Retrieve a specific category by ID
@@ -184,8 +284,8 @@ def create_app():
                     return {"message": "Category not found"}, 404
             else:
                 # Retrieve all categories
-                categories = Category.query.all()
-                return jsonify([category.to_dict() for category in categories])
+                rows = db.session.execute(category_schema.select().order_by(Category.id))
+                return json_response(category_schema.dump(rows))
 
         @admin_required
         def patch(self, category_id):
@@ -198,6 +298,7 @@ def create_app():
             category.name = data.get('name', category.name)
             category.description = data.get('description', category.description)
             db.session.commit()
+            catalog_cache.invalidate('categories')
             return jsonify({"message": "Category updated successfully", "category": category.to_dict()})
 
         @admin_required
@@ -208,6 +309,7 @@ def create_app():
 
             db.session.delete(category)
             db.session.commit()
+            catalog_cache.invalidate('categories')
             return {"message": "Category deleted successfully"}, 200
     
     category.add_resource(CategoryResource, '/categories', '/categories/<int:category_id>')
@@ -250,13 +352,12 @@ def create_app():
         @jwt_required()
         def get(self):
             user_id = get_jwt_identity()['user_id']
-            cart = Cart.query.filter_by(user_id=user_id).first()
+            cart = Cart.load_for_user(user_id)
             
             if not cart:
                 return {"message": "No cart found for this user"}, 404
             
-            cart_items = CartItem.query.filter_by(cart_id=cart.id).all()
-            cart_items_dict = [item.to_dict() for item in cart_items]
+            cart_items_dict = [item.to_dict() for item in cart.cart_items]
             
             return (cart_items_dict), 200
         
@@ -269,9 +370,11 @@ def create_app():
             if not cart:
                 return {"message": "Cart not found for this user, please create a cart first"}, 404
             
-            cart_item = CartItem(cart_id=cart.id, product_id=data['product_id'], quantity=data['quantity'])
-            db.session.add(cart_item)
-            db.session.commit()
+            # Adding a product already in the cart increases its quantity
+            try:
+                apply_cart_operations(cart, [{'op': 'add', 'product_id': data.get('product_id'), 'quantity': data.get('quantity')}])
+            except RequestError as e:
+                return e.to_dict(), e.status_code
             return {"message": "Added to cart"}, 201
         
         @jwt_required()
@@ -283,6 +386,7 @@ def create_app():
             if 'quantity' in data:
                 cart_item.quantity = data['quantity']
             
+            touch_cart(cart_item.cart_id)
             db.session.commit()
             return {"message": "Cart item updated", "cart_item": cart_item.to_dict()}, 200
 
@@ -291,18 +395,38 @@ def create_app():
             if cart_item_id:
                 cart_item = CartItem.query.get_or_404(cart_item_id)
                 db.session.delete(cart_item)
+                touch_cart(cart_item.cart_id)
                 db.session.commit()
                 return {"message": "Item removed from cart"}, 200
             else:
+                # One DELETE for every line of the user's cart, nothing loaded into the session
                 user_id = get_jwt_identity()['user_id']
-                cart_items = CartItem.query.filter_by(cart_id=user_id).all()
-                for item in cart_items:
-                    db.session.delete(item)
-                db.session.commit()
-                return {"message": "Cart cleared successfully"}, 200
+                removed = clear_cart(user_id)
+                return {"message": "Cart cleared successfully", "removed_items": removed}, 200
 
     api_cart.add_resource(CartResource, '/cart', '/cart/<int:cart_item_id>')
 
+    class CartBatchResource(Resource):
+        @jwt_required()
+        def post(self):
+            user_id = get_jwt_identity()['user_id']
+            data = request.get_json() or {}
+
+            cart = Cart.query.filter_by(user_id=user_id).first()
+            if not cart:
+                return {"message": "Cart not found for this user, please create a cart first"}, 404
+
+            # All operations are applied in one transaction, or none are
+            try:
+                apply_cart_operations(cart, data.get('operations'))
+            except RequestError as e:
+                return e.to_dict(), e.status_code
+
+            cart = Cart.load_for_user(user_id)
+            return [item.to_dict() for item in cart.cart_items], 200
+
+    api_cart.add_resource(CartBatchResource, '/cart/batch')
+
     order_bp = Blueprint('order', __name__)
     api_order = Api(order_bp)
 
@@ -311,64 +435,41 @@ def create_app():
         def get(self, order_id=None):
             user_id = get_jwt_identity()['user_id']
             if order_id:
-                order = Order.query.get_or_404(order_id)
+                order = Order.query.options(Order.with_items()).filter_by(id=order_id).first_or_404()
                 if order.user_id != user_id:
-                    return jsonify({"message": "Unauthorized"}), 403
-                return jsonify({
-            "status": order.status.value,
-            "total_price": str(order.total_price),
-            "order_items": [item.to_dict() for item in order.order_items]
-                })
+                    return {"message": "Unauthorized"}, 403
+                return jsonify(order.to_history_dict())
             else:
-                orders = Order.query.filter_by(user_id=user_id).all()
-                return jsonify([{
-                    "status": o.status.value,
-                    "total_price": str(o.total_price),
-                    "order_items": [item.to_dict() for item in o.order_items]
-                } for o in orders])
+                # One page of the history, newest first, keyed on (created_at, id) within
+                # the user's slice of ix_orders_user_id_created_at_id; two queries per page
+                args = order_history_parser.parse_args()
+                query = Order.query.options(Order.with_items()).filter(Order.user_id == user_id)
+                if args['status'] is not None:
+                    query = query.filter(Order.status == args['status'])
+                try:
+                    orders, next_cursor = keyset_page(
+                        query, (Order.created_at, Order.id), cursor=args['cursor'], limit=clamp_limit(args['limit'])
+                    )
+                except InvalidCursor:
+                    return {"message": "Invalid cursor"}, 400
+
+                response = jsonify([order.to_history_dict() for order in orders])
+                if next_cursor:
+                    response.headers['X-Next-Cursor'] = next_cursor
+                    response.headers['Link'] = f'<{request.base_url}?{_next_page_query(next_cursor)}>; rel="next"'
+                return response
         
         @jwt_required()
         def post(self):
-            data = request.get_json()
+            data = request.get_json() or {}
             
             user_id = get_jwt_identity()['user_id']
             
-            # Create the order (initial total price is set to 0)
-            order = Order(user_id=user_id, total_price=0, status=OrderStatusEnum.PENDING)
-            db.session.add(order)
-            db.session.commit()
-            
-            total_price = 0  # Initialize total price
-            
-            for item_data in data.get('order_items', []):
-                product = Product.query.get(item_data['product_id'])
-                if not product:
-                    return {"message": f"Product with ID {item_data['product_id']} not found"}, 404
-                
-                order_item = OrderItem(
-                    order_id=order.id,
-                    product_id=product.id,
-                    quantity=item_data['quantity'],
-                    price=product.price
-                )
-                db.session.add(order_item)
-                
-                # Calculate the total price based on quantity and product price
-                total_price += product.price * item_data['quantity']
-            
-            # Update the order with the calculated total price
-            order.total_price = total_price
-            db.session.commit()
-            
-            invoice = Invoice(
-                order_id=order.id,
-                billing_address=data['billing_address'],  # Assume billing address is included in the request
-                total_amount=order.total_price
-            )
-            db.session.add(invoice)
-            db.session.commit()
-            
-            Analytics.update_total_orders_and_revenue(total_price)
+            # Order, items, invoice and the follow-up jobs are written in a single transaction
+            try:
+                order, invoice = place_order(user_id, data.get('order_items'), data.get('billing_address'))
+            except RequestError as e:
+                return e.to_dict(), e.status_code
             
             return {"message": "Order created and invoice generated", "order_id": order.id, "invoice_id": invoice.id}, 201
 
@@ -377,21 +478,50 @@ def create_app():
     product_bp = Blueprint('product', __name__)
     api_product = Api(product_bp)
 
+    def record_product_view(product_id=None):
+        if product_id:
+            view_counter.record(product_id)  # Buffered; no write on the read path
+
     class ProductResource(Resource):
         @jwt_required()
+        @conditional_get('products', on_serve=record_product_view, exists=row_exists(Product, 'product_id'))
         def get(self, product_id=None):
             if product_id:
                 # Get a specific product by ID
                 product = Product.query.get(product_id)
                 if product:
-                    Analytics.update_product_views()
                     return jsonify(product.to_dict())
                 else:
                     return {"message": "Product not found"}, 404
             else:
-                # Get all products
-                products = Product.query.all()
-                return jsonify([product.to_dict() for product in products])
+                # Get one page of products, newest first, keyed on (created_at, id)
+                args = product_list_parser.parse_args()
+                query = product_schema.query()  # Plain column rows, no ORM instances
+                if args['category_id'] is not None:
+                    query = query.filter(Product.category_id == args['category_id'])
+                if args['min_price'] is not None:
+                    query = query.filter(Product.price >= args['min_price'])
+                if args['max_price'] is not None:
+                    query = query.filter(Product.price <= args['max_price'])
+                if args['in_stock'] is True:
+                    query = query.filter(Product.stock > 0)
+                elif args['in_stock'] is False:
+                    query = query.filter(Product.stock <= 0)
+
+                try:
+                    products, next_cursor = keyset_page(
+                        query, (Product.created_at, Product.id),
+                        cursor=args['cursor'], limit=clamp_limit(args['limit'])
+                    )
+                except InvalidCursor:
+                    return {"message": "Invalid cursor"}, 400
+
+                response = json_response(product_schema.dump(products))
+                if next_cursor:
+                    # Keep the body a plain list for existing clients; the next page is advertised in headers
+                    response.headers['X-Next-Cursor'] = next_cursor
+                    response.headers['Link'] = f'<{request.base_url}?{_next_page_query(next_cursor)}>; rel="next"'
+                return response
 
         @jwt_required()
         def post(self):
@@ -406,17 +536,55 @@ def create_app():
             )
             db.session.add(new_product)
             db.session.commit()
+            catalog_cache.invalidate('products')
             return jsonify({"message": "Product created successfully", "product": new_product.to_dict()}), 201
 
 
+    class ProductSearchResource(Resource):
+        @jwt_required()
+        @conditional_get('products', 'categories')
+        def get(self):
+            # Full-text search over name, description and category, best matches first
+            args = product_search_parser.parse_args()
+            if not args['q'].strip():
+                return {"message": "Search text is required"}, 400
+            try:
+                offset, = decode_cursor(args['cursor']) if args['cursor'] else (0,)
+                if type(offset) is not int or not 0 <= offset <= MAX_OFFSET:
+                    raise InvalidCursor(args['cursor'])
+            except ValueError:  # InvalidCursor, or a cursor that is not exactly one value
+                return {"message": "Invalid cursor"}, 400
+
+            limit = clamp_limit(args['limit'])
+            products, has_more = search_products(args['q'], limit, offset, args['prefix'])
+
+            response = jsonify([product.to_dict() for product in products])
+            if has_more and offset + limit <= MAX_OFFSET:
+                next_cursor = encode_cursor(offset + limit)
+                response.headers['X-Next-Cursor'] = next_cursor
+                response.headers['Link'] = f'<{request.base_url}?{_next_page_query(next_cursor)}>; rel="next"'
+            return response
+
         # Register both endpoints: one for all products and one for a single product by ID
     api_product.add_resource(ProductResource, '/products', '/products/<int:product_id>')
+    api_product.add_resource(ProductSearchResource, '/products/search')
 
 
     ### Analytics Management for Admin ###
+    analytics_parser = reqparse.RequestParser()
+    analytics_parser.add_argument('days', type=inputs.int_range(1, MAX_WINDOW_DAYS), default=7, location='args',
+                                  help=f'days must be between 1 and {MAX_WINDOW_DAYS}')
+    analytics_parser.add_argument('limit', type=inputs.int_range(1, MAX_TOP_N), default=10, location='args',
+                                  help=f'limit must be between 1 and {MAX_TOP_N}')
+
     class AnalyticsResource(Resource):
         @admin_required
-        def get(self):
+        def get(self, product_id=None):
+            args = analytics_parser.parse_args()
+            if product_id:
+                # Lifetime and daily rollups for a single product
+                return jsonify(product_history(product_id, args['days']))
+
             try:
                 # Try to fetch the first analytics record
                 analytics = Analytics.query.first()
@@ -427,8 +595,15 @@ def create_app():
                     db.session.add(analytics)
                     db.session.commit()
 
-                # Return the analytics data as JSON
-                return jsonify(analytics.to_dict())
+                # Totals plus windowed aggregates served from the rollup tables, so the
+                # cost depends on the window size rather than the order history
+                return jsonify({
+                    **analytics.to_dict(),
+                    'window_days': args['days'],
+                    'most_purchased': top_products('units_sold', args['days'], args['limit']),
+                    'most_viewed': top_products('views', args['days'], args['limit']),
+                    'daily': daily_totals(args['days'])
+                })
 
             except SQLAlchemyError as e:
                 db.session.rollback()  # Rollback the session in case of an error
@@ -437,27 +612,75 @@ def create_app():
     # Create Api instance for analytics blueprint
     api_analytics_bp = Blueprint('analytics', __name__)  # Create the blueprint
     api_analytics = Api(api_analytics_bp)  # Create Api instance with the blueprint
-    api_analytics.add_resource(AnalyticsResource, '/analytics')
+    api_analytics.add_resource(AnalyticsResource, '/analytics', '/analytics/products/<int:product_id>')
 
     # Create Invoice Management Resource for Users ###
+    def load_invoice(order_id):
+        # The invoice of one of the caller's orders (any order for admins), with the owner in the same query
+        identity = get_jwt_identity()
+        row = (
+            db.session.query(Invoice, Order.user_id)
+            .join(Order, Order.id == Invoice.order_id)
+            .filter(Invoice.order_id == order_id)
+            .first()
+        )
+        if not row:
+            return None, ({"message": "Invoice not found"}, 404)
+        invoice, owner_id = row
+        if owner_id != identity['user_id'] and role_for(identity) != 'admin':
+            return None, ({"message": "Unauthorized"}, 403)
+        return invoice, None
+
     class InvoiceResource(Resource):
         @jwt_required()
         def get(self, order_id):
-            invoice = Invoice.query.filter_by(order_id=order_id).first()
-            if not invoice:
-                return {"message": "Invoice not found"}, 404
-            return jsonify(invoice.to_dict())
+            invoice, error = load_invoice(order_id)
+            if error:
+                return error
+            if not invoice.document_hash:
+                ensure_document(invoice, 'json')  # The render job has not run yet
+            data = invoice.to_dict()
+            data['documents'] = {
+                fmt: f'{request.base_url}/documents/{invoice.document_hash}.{fmt}' for fmt in DOCUMENT_FORMATS
+            }
+            return jsonify(data)
+
+    class InvoiceDocumentResource(Resource):
+        @jwt_required()
+        def get(self, order_id, content_hash, fmt):
+            if fmt not in DOCUMENT_FORMATS:
+                return {"message": f"format must be one of {', '.join(DOCUMENT_FORMATS)}"}, 404
+            invoice, error = load_invoice(order_id)
+            if error:
+                return error
+            if invoice.document_hash and invoice.document_hash != content_hash:
+                return {"message": "Invoice document not found"}, 404  # Superseded by a re-render
+
+            path = ensure_document(invoice, fmt)
+            if invoice.document_hash != content_hash:
+                return {"message": "Invoice document not found"}, 404
+
+            # The URL names the content, so it can be cached for good; send_file streams
+            # the file with the server's sendfile support and answers If-None-Match with 304
+            response = send_file(path, mimetype=DOCUMENT_MIMETYPES[fmt], etag=content_hash, conditional=True,
+                                 max_age=DOCUMENT_MAX_AGE, download_name=f'invoice-{invoice.id}.{fmt}')
+            response.cache_control.public = False
+            response.cache_control.private = True
+            response.cache_control.immutable = True
+            return response
 
     # Create a blueprint for the invoice resource
     invoice_bp = Blueprint('invoice', __name__)
     api_invoice = Api(invoice_bp)  # Create an Api instance for the blueprint
     api_invoice.add_resource(InvoiceResource, '/invoices/<int:order_id>')
+    api_invoice.add_resource(InvoiceDocumentResource, '/invoices/<int:order_id>/documents/<string:content_hash>.<string:fmt>')
 
     ### Admin Blueprint Registration ###
     admin_bp = Blueprint('admin', __name__)
     api_admin = Api(admin_bp)
     api_admin.add_resource(AdminProductResource, '/products', '/products/<int:product_id>')
     api_admin.add_resource(AdminOrderResource, '/orders', '/orders/<int:order_id>')
+    api_admin.add_resource(AdminOrderExportResource, '/orders/export')
 
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
 
@@ -470,6 +693,11 @@ def create_app():
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(category_bp, url_prefix='/api')
 
+    # Prometheus scrape endpoint for process-local metrics (pool checkout latency, per-endpoint timings, ...)
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
 
     return app
 
@@ -2,7 +2,6 @@
 
 from flask import Blueprint, request, jsonify
 from flask_restful import Api, Resource, reqparse
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
@@ -12,6 +11,8 @@ from flask_jwt_extended import (
     JWTManager
 )
 from models import db, User, Cart
+from blocklist import get_blocklist
+from passwords import hash_password, verify_password, HashingBusy
 from marshmallow import Schema, fields
 from datetime import timedelta, datetime
 
@@ -19,9 +20,6 @@ from datetime import timedelta, datetime
 auth_bp = Blueprint('auth', __name__)
 api_auth = Api(auth_bp)
 
-# Token blacklist for handling logout
-BLACKLIST = set()
-
 # Initialize JWT Manager (to be done in the main app)
 jwt = JWTManager()
 
@@ -33,11 +31,12 @@ user_parser.add_argument('password', type=str, required=True, help='Password is
 user_parser.add_argument('role', type=str, required=True, help="Role is required ('admin' or 'customer')")
 
 
-# Callback function to check if a token is blacklisted
+# Callback function to check if a token is blacklisted; revoked tokens live in the
+# shared blocklist store (see blocklist.py) until they expire
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blacklist(jwt_header, jwt_payload):
     jti = jwt_payload["jti"]
-    return jti in BLACKLIST
+    return get_blocklist().is_revoked(jti)
 
 # RegisterResource class for user registration
 class RegisterResource(Resource):
@@ -54,8 +53,11 @@ class RegisterResource(Resource):
         if existing_user:
             return {"message": "Email already registered"}, 400
 
-        # Hash the password before storing it
-        hashed_password = generate_password_hash(data['password'])
+        # Hash the password before storing it, on the bounded hashing pool
+        try:
+            hashed_password = hash_password(data['password'])
+        except HashingBusy:
+            return {"message": "Server busy, please retry"}, 503
 
         try:
             user = User(
@@ -93,8 +95,20 @@ class LoginResource(Resource):
         # Find the user by email
         user = User.query.filter_by(email=data['email']).first()
 
-        # If user exists and password is correct, generate JWT tokens
-        if user and check_password_hash(user.password_digest, data['password']):
+        if not user:
+            return {"message": "Invalid credentials"}, 401
+
+        try:
+            valid, needs_rehash = verify_password(user.password_digest, data['password'])
+            if valid and needs_rehash:
+                # Upgrade digests made under an older, weaker policy while we have the password
+                user.password_digest = hash_password(data['password'])
+                db.session.commit()
+        except HashingBusy:
+            return {"message": "Server busy, please retry"}, 503
+
+        # If the password is correct, generate JWT tokens
+        if valid:
             access_token = create_access_token(identity={'user_id': user.id, 'role': user.role.name})
             refresh_token = create_refresh_token(identity={'user_id': user.id, 'role': user.role.name})
             return {"access_token": access_token, "refresh_token": refresh_token}, 200
@@ -115,11 +129,11 @@ class TokenRefreshResource(Resource):
 class LogoutResource(Resource):
     @jwt_required()
     def post(self):
-        # Get the unique identifier for the token
-        jti = get_jwt()["jti"]
+        # Get the unique identifier and expiry for the token
+        token = get_jwt()
         
-        # Add the token's jti to the blacklist to invalidate it
-        BLACKLIST.add(jti)
+        # Add the token's jti to the blocklist until it would have expired anyway
+        get_blocklist().revoke(token["jti"], datetime.utcfromtimestamp(token["exp"]))
         
         return {"message": "Successfully logged out"}, 200
 
@@ -0,0 +1,100 @@
+#benchmarks/blocklist_watermark.py
+"""Check that revocations made after a purge still reach the other workers.
+
+Workers pick up each other's revocations by reading the ``revoked_tokens``
+rows above the last id they have seen. One blocklist revokes a batch of tokens,
+a second one syncs past them, every token expires and is purged, and then a new
+token is revoked: the second blocklist must see it on its next ``since()``,
+which fails if the purge let SQLite hand out an id at or below its watermark.
+A second case revokes a token from another worker while a blocklist rebuilds
+its filter, between its read of the active tokens and of the watermark (in
+whichever order it makes them); the rebuilt blocklist must still report it
+revoked after its next sync. Exits with code 1 if either revocation is missed.
+
+    python benchmarks/blocklist_watermark.py --tokens 100
+"""
+
+import argparse
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+from common import build_app
+from blocklist import SQLiteBlocklist, TokenBlocklist
+
+
+class _RevokeDuringRebuild(SQLiteBlocklist):
+    # Lets another worker revoke a token right after the first of the two reads of a rebuild
+
+    def __init__(self, other, expires_at):
+        self.other = other
+        self.expires_at = expires_at
+        self.jti = None
+
+    def _interleave(self):
+        if self.jti is None:
+            self.jti = str(uuid.uuid4())
+            self.other.add(self.jti, self.expires_at)
+
+    def active(self, now):
+        try:
+            return super().active(now)
+        finally:
+            self._interleave()
+
+    def since(self, watermark):
+        try:
+            return super().since(watermark)
+        finally:
+            self._interleave()
+
+
+def check_purge_then_revoke(app, tokens):
+    """Revoke, sync, purge everything, revoke again; returns a failure message or None."""
+    revoking, syncing = SQLiteBlocklist(), SQLiteBlocklist()
+    now = datetime.utcnow()
+    with app.app_context():
+        for _ in range(tokens):
+            revoking.add(str(uuid.uuid4()), now + timedelta(minutes=5))
+        seen, watermark = syncing.since(0)
+        purged = revoking.purge(now + timedelta(minutes=10))
+        jti = str(uuid.uuid4())
+        revoking.add(jti, now + timedelta(hours=1))
+        new, next_watermark = syncing.since(watermark)
+
+    print(f"synced {len(seen)} revocations up to id {watermark}, purged {purged}")
+    print(f"after revoking one more: since({watermark}) -> {len(new)} revocations, watermark {next_watermark}")
+    if new != [jti]:
+        return "a revocation made after the purge was missed by the syncing worker"
+    return None
+
+
+def check_revoke_during_rebuild(app):
+    """Revoke from another worker in the middle of a filter rebuild; returns a failure message or None."""
+    backend = _RevokeDuringRebuild(SQLiteBlocklist(), datetime.utcnow() + timedelta(hours=1))
+    blocklist = TokenBlocklist(backend, sync_interval=0.0)
+    with app.app_context():
+        blocklist.is_revoked(str(uuid.uuid4()))  # First build, with the interleaved revocation
+        revoked = blocklist.is_revoked(backend.jti)  # After the next sync
+    print(f"revoked during rebuild: is_revoked -> {revoked}")
+    if not revoked:
+        return "a revocation made while the filter was rebuilt was missed"
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tokens', type=int, default=100)
+    args = parser.parse_args()
+
+    app, db_path = build_app(config={'JWT_BLOCKLIST_BACKEND': 'sqlite', 'JOB_WORKERS': 0})
+    print(f"database: {db_path}")
+    failures = [f for f in (check_purge_then_revoke(app, args.tokens), check_revoke_during_rebuild(app)) if f]
+    if failures:
+        print("FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("OK: revocations after a purge or during a rebuild are seen past the watermark")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#benchmarks/checkout_concurrency.py
+"""Fire parallel checkouts at the test client and verify stock is never oversold.
+
+Every product starts with a small stock, many threads order random baskets at
+once, and the run fails (exit code 1) if any product goes negative, if stock
+decrements don't match the quantities on committed orders (lost update), or if
+the analytics order count disagrees with the orders table.
+
+    python benchmarks/checkout_concurrency.py --threads 16 --orders 40
+"""
+
+import argparse
+import random
+import sys
+import threading
+from collections import Counter
+
+from common import build_app, seed_catalog, auth_headers
+from models import db, Product, Order, OrderItem, Analytics
+from jobs import job_queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--orders', type=int, default=40, help='checkouts per thread')
+    parser.add_argument('--products', type=int, default=5)
+    parser.add_argument('--stock', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    app, db_path = build_app()
+    _, customer_id = seed_catalog(app, products=args.products, stock=args.stock)
+    headers = auth_headers(app, customer_id, 'customer')
+    statuses = Counter()
+    lock = threading.Lock()
+    start = threading.Barrier(args.threads)
+
+    def worker(n):
+        rng = random.Random(args.seed + n)
+        client = app.test_client()
+        start.wait()
+        for _ in range(args.orders):
+            basket = rng.sample(range(1, args.products + 1), rng.randint(1, min(3, args.products)))
+            payload = {
+                'billing_address': '1 Concurrency Lane',
+                'order_items': [{'product_id': pid, 'quantity': rng.randint(1, 3)} for pid in basket],
+            }
+            status = client.post('/api/orders', json=payload, headers=headers).status_code
+            with lock:
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Analytics are updated by the order.analytics jobs; run whatever the workers have not
+    job_queue.drain(app)
+
+    failures = []
+    with app.app_context():
+        stock = dict(db.session.query(Product.id, Product.stock).all())
+        sold = dict(
+            db.session.query(OrderItem.product_id, db.func.sum(OrderItem.quantity))
+            .group_by(OrderItem.product_id).all()
+        )
+        orders = Order.query.count()
+        analytics = Analytics.query.first()
+
+    for product_id, remaining in sorted(stock.items()):
+        units = sold.get(product_id, 0)
+        print(f"product {product_id}: sold {units}, remaining {remaining}")
+        if remaining < 0:
+            failures.append(f"product {product_id} oversold: stock {remaining}")
+        if remaining + units != args.stock:
+            failures.append(f"product {product_id} lost update: {remaining} + {units} != {args.stock}")
+    if orders != statuses[201]:
+        failures.append(f"{statuses[201]} checkouts returned 201 but {orders} orders exist")
+    if analytics.total_orders != orders:
+        failures.append(f"analytics counted {analytics.total_orders} orders, table has {orders}")
+
+    print(f"database: {db_path}")
+    print(f"responses: {dict(statuses)}")
+    if failures:
+        print("FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("OK: no oversell or lost update")
+
+
+if __name__ == '__main__':
+    main()
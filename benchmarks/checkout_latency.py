@@ -0,0 +1,40 @@
+#benchmarks/checkout_latency.py
+"""Checkout latency against the number of line items per order.
+
+    python benchmarks/checkout_latency.py --repeat 50
+"""
+
+import argparse
+
+from common import build_app, seed_catalog, auth_headers, timed, summarize
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=30, help='checkouts per line-item count')
+    parser.add_argument('--lines', type=int, nargs='+', default=[1, 5, 10, 25, 50, 100])
+    args = parser.parse_args()
+
+    app, db_path = build_app()
+    _, customer_id = seed_catalog(app, products=max(args.lines))
+    headers = auth_headers(app, customer_id, 'customer')
+    client = app.test_client()
+
+    print(f"database: {db_path}")
+    print(f"{'lines':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10}")
+    for lines in args.lines:
+        payload = {
+            'billing_address': '1 Benchmark Way',
+            'order_items': [{'product_id': i + 1, 'quantity': 1} for i in range(lines)],
+        }
+
+        def checkout():
+            response = client.post('/api/orders', json=payload, headers=headers)
+            assert response.status_code == 201, response.get_json()
+
+        stats = summarize(timed(checkout, args.repeat))
+        print(f"{lines:>6} {stats['mean_ms']:>10} {stats['p50_ms']:>10} {stats['p95_ms']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#benchmarks/common.py
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from flask_migrate import upgrade  # noqa: E402
+from app import create_app  # noqa: E402
+from models import db, User, Category, Product, Cart, Analytics, RoleEnum  # noqa: E402
+import seed_bulk  # noqa: E402
+
+MIGRATIONS_DIR = os.path.join(ROOT, 'migrations')
+
+
+def build_app(db_path=None, config=None):
+    """Create the app against a fresh SQLite file migrated to head."""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='beautyshop-bench-'), 'bench.sqlite')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}', **(config or {})})
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+    return app, db_path
+
+
+def seed_catalog(app, products=100, categories=3, stock=1000):
+    """Insert an admin, a customer with a cart, and a catalog; returns (admin_id, customer_id)."""
+    with app.app_context():
+        admin = User(first_name='Bench', last_name='Admin', email='bench_admin@example.com',
+                     password_digest='!', role=RoleEnum.admin)
+        customer = User(first_name='Bench', last_name='Customer', email='bench_customer@example.com',
+                        password_digest='!', role=RoleEnum.customer)
+        db.session.add_all([admin, customer])
+        db.session.flush()
+        db.session.add(Cart(user_id=customer.id))
+        db.session.add(Analytics(product_views=0, total_orders=0, revenue=0))
+
+        category_rows = [Category(name=f'Category {i}', description='Benchmark category') for i in range(categories)]
+        db.session.add_all(category_rows)
+        db.session.flush()
+
+        base = datetime.utcnow() - timedelta(days=365)
+        db.session.execute(db.insert(Product), [
+            {
+                'name': f'Product {i}',
+                'description': f'Benchmark product number {i}',
+                'price': round(5 + (i % 97) * 0.5, 2),
+                'stock': stock,
+                'category_id': category_rows[i % categories].id,
+                'user_id': admin.id,
+                'created_at': base + timedelta(seconds=i),
+            }
+            for i in range(products)
+        ])
+        db.session.commit()
+        return admin.id, customer.id
+
+
+def seed_volume(app, users=1000, products=5000, orders=20000, days=90, seed=42):
+    """Seed realistic volumes with the bulk generator; returns ``(admin_id, customer_ids)``."""
+    with app.app_context():
+        return seed_bulk.seed(users=users, products=products, orders=orders, days=days, random_seed=seed,
+                              echo=lambda line: None)
+
+
+def auth_headers(app, user_id, role):
+    with app.app_context():
+        token = create_access_token(identity={'user_id': user_id, 'role': role})
+    return {'Authorization': f'Bearer {token}'}
+
+
+def timed(fn, repeat):
+    """Run ``fn`` ``repeat`` times and return per-call latencies in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {
+        'count': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'p50_ms': round(pick(0.50), 3),
+        'p95_ms': round(pick(0.95), 3),
+        'p99_ms': round(pick(0.99), 3),
+    }
@@ -0,0 +1,353 @@
+#benchmarks/load_test.py
+"""Mixed-workload load test of the whole API, in-process and against gunicorn.
+
+Builds the app with ``create_app`` on a temporary SQLite file, seeds
+realistic volumes (``seed_volume``: customers with carts, a catalog and order
+history), then runs concurrent virtual users for ``--duration`` seconds with
+a weighted mix of scenarios:
+
+* browse: product list pages (following cursors), detail, search, categories
+* cart: add an item and view the cart
+* checkout: place a 1-3 line order
+* admin: last day's order export and the analytics dashboard
+
+``--target inprocess`` drives the Flask test client from threads,
+``--target gunicorn`` starts a local gunicorn (``pip install gunicorn``) on
+the same database and talks HTTP to it. Per-operation and overall
+p50/p95/p99 latency and throughput are printed and written to ``--output``
+as JSON; ``--compare`` prints the change against an earlier result file.
+
+    python benchmarks/load_test.py --target both --duration 30 --concurrency 16 --output load.json
+    python benchmarks/load_test.py --target inprocess --compare load.json
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import platform
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from common import ROOT, build_app, seed_volume, auth_headers, summarize
+
+DEFAULT_MIX = {'browse': 60, 'cart': 20, 'checkout': 10, 'admin': 10}
+SEARCH_TERMS = ['serum', 'hydrating shampoo', 'lip', 'matte foundation', 'daily', 'oil']
+
+
+class TestClientSession:
+    # One Flask test client per virtual user
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None, headers=None):
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers, response.get_data()
+
+    def close(self):
+        pass
+
+
+class HttpSession:
+    # Keep-alive HTTP/1.1 connection per virtual user
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        headers = dict(headers or {})
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.headers, response.read()
+            except (ConnectionError, http.client.HTTPException):
+                self.close()  # Server closed an idle keep-alive connection; retry once
+                if attempt == 2:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class InProcessTarget:
+    name = 'inprocess'
+
+    def __init__(self, app, db_path, args):
+        self.app = app
+
+    def session(self):
+        return TestClientSession(self.app)
+
+    def stop(self):
+        pass
+
+
+class GunicornTarget:
+    name = 'gunicorn'
+
+    def __init__(self, app, db_path, args):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            self.port = probe.getsockname()[1]
+        factory = f"app:create_app({{'SQLALCHEMY_DATABASE_URI': 'sqlite:///{db_path}'}})"
+        self.process = subprocess.Popen([
+            sys.executable, '-m', 'gunicorn', '--chdir', ROOT, '--bind', f'127.0.0.1:{self.port}',
+            '--workers', str(args.workers), '--threads', str(args.threads), '--log-level', 'warning', factory,
+        ])
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with code {self.process.returncode}")
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError("gunicorn did not start listening within 30s")
+
+    def session(self):
+        return HttpSession('127.0.0.1', self.port)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+TARGETS = {'inprocess': InProcessTarget, 'gunicorn': GunicornTarget}
+
+
+class Workload:
+    """Scenarios as sequences of timed operations; each records ``(operation, seconds, status)``."""
+
+    def __init__(self, product_count, admin_headers, customer_headers, mix):
+        self.product_count = product_count
+        self.admin_headers = admin_headers
+        self.customer_headers = customer_headers
+        self.scenarios = [getattr(self, name) for name in mix]
+        self.weights = list(mix.values())
+
+    def _call(self, record, session, operation, method, path, body=None, headers=None):
+        start = time.perf_counter()
+        try:
+            status, response_headers, _ = session.request(method, path, body, headers)
+        except Exception:
+            status, response_headers = 599, {}  # Transport failure
+        record(operation, time.perf_counter() - start, status)
+        return status, response_headers
+
+    def _product_id(self, rng):
+        return rng.randint(1, self.product_count)
+
+    def browse(self, session, rng, record):
+        headers = rng.choice(self.customer_headers)
+        query = f'/api/products?limit=20&category_id={rng.randint(1, 3)}' if rng.random() < 0.5 else '/api/products?limit=20'
+        status, response_headers = self._call(record, session, 'products.list', 'GET', query, headers=headers)
+        cursor = response_headers.get('X-Next-Cursor') if status == 200 else None
+        if cursor and rng.random() < 0.5:
+            self._call(record, session, 'products.list', 'GET', f'{query}&cursor={cursor}', headers=headers)
+        self._call(record, session, 'products.detail', 'GET', f'/api/products/{self._product_id(rng)}', headers=headers)
+        if rng.random() < 0.5:
+            term = rng.choice(SEARCH_TERMS).replace(' ', '+')
+            self._call(record, session, 'products.search', 'GET', f'/api/products/search?q={term}', headers=headers)
+        if rng.random() < 0.2:
+            self._call(record, session, 'categories.list', 'GET', '/api/categories', headers=headers)
+
+    def cart(self, session, rng, record):
+        headers = rng.choice(self.customer_headers)
+        body = {'product_id': self._product_id(rng), 'quantity': rng.randint(1, 2)}
+        self._call(record, session, 'cart.add', 'POST', '/api/cart', body, headers)
+        self._call(record, session, 'cart.view', 'GET', '/api/cart', headers=headers)
+
+    def checkout(self, session, rng, record):
+        headers = rng.choice(self.customer_headers)
+        lines = rng.sample(range(1, self.product_count + 1), rng.randint(1, 3))
+        body = {'billing_address': '1 Load Test Way', 'order_items': [{'product_id': p, 'quantity': 1} for p in lines]}
+        self._call(record, session, 'checkout', 'POST', '/api/orders', body, headers)
+
+    def admin(self, session, rng, record):
+        since = (datetime.utcnow() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%S')
+        self._call(record, session, 'admin.orders.export', 'GET', f'/api/admin/orders/export?start={since}',
+                   headers=self.admin_headers)
+        self._call(record, session, 'admin.analytics', 'GET', '/api/analytics', headers=self.admin_headers)
+
+
+def run(target, workload, args):
+    samples = defaultdict(list)  # operation -> [seconds]
+    statuses = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    warmup_until = time.perf_counter() + args.warmup
+    deadline = warmup_until + args.duration
+
+    def user(n):
+        rng = random.Random(args.seed + n)
+        session = target.session()
+        local = defaultdict(list)
+        local_statuses = defaultdict(lambda: defaultdict(int))
+
+        def record(operation, seconds, status):
+            if time.perf_counter() >= warmup_until:
+                local[operation].append(seconds)
+                local_statuses[operation][status] += 1
+
+        try:
+            while time.perf_counter() < deadline:
+                rng.choices(workload.scenarios, workload.weights)[0](session, rng, record)
+        finally:
+            session.close()
+            with lock:
+                for operation, values in local.items():
+                    samples[operation].extend(values)
+                for operation, counts in local_statuses.items():
+                    for status, count in counts.items():
+                        statuses[operation][status] += count
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    def report(values, counts):
+        stats = summarize([v * 1000 for v in values]) if values else {'count': 0}
+        stats['throughput_rps'] = round(len(values) / args.duration, 2)
+        stats['errors'] = sum(count for status, count in counts.items() if status >= 500)
+        stats['statuses'] = {str(status): count for status, count in sorted(counts.items())}
+        return stats
+
+    operations = {op: report(samples[op], statuses[op]) for op in sorted(samples)}
+    all_counts = defaultdict(int)
+    for counts in statuses.values():
+        for status, count in counts.items():
+            all_counts[status] += count
+    overall = report([v for values in samples.values() for v in values], all_counts)
+    return {'overall': overall, 'operations': operations}
+
+
+def print_run(name, result):
+    print(f"\n[{name}]")
+    print(f"{'operation':<22} {'count':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for operation, stats in list(result['operations'].items()) + [('overall', result['overall'])]:
+        if not stats['count']:
+            continue
+        print(f"{operation:<22} {stats['count']:>7} {stats['throughput_rps']:>8} {stats['p50_ms']:>9} "
+              f"{stats['p95_ms']:>9} {stats['p99_ms']:>9} {stats['errors']:>7}")
+
+
+def print_comparison(previous, current):
+    print(f"\nchange vs {previous['meta'].get('commit') or 'previous run'} (p95 and throughput)")
+    for name, result in current['runs'].items():
+        before = previous['runs'].get(name)
+        if not before or 'overall' not in before or 'overall' not in result:
+            continue
+        for operation, stats in list(result['operations'].items()) + [('overall', result['overall'])]:
+            old = before['operations'].get(operation) if operation != 'overall' else before['overall']
+            if not old or not old.get('count') or not stats.get('count'):
+                continue
+            p95 = (stats['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100 if old['p95_ms'] else 0.0
+            rps = (stats['throughput_rps'] - old['throughput_rps']) / old['throughput_rps'] * 100 if old['throughput_rps'] else 0.0
+            print(f"  {name:<10} {operation:<22} p95 {p95:+7.1f}%   rps {rps:+7.1f}%")
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', choices=['inprocess', 'gunicorn', 'both'], default='inprocess')
+    parser.add_argument('--duration', type=float, default=20.0, help='measured seconds per target')
+    parser.add_argument('--warmup', type=float, default=3.0, help='unmeasured seconds before each run')
+    parser.add_argument('--concurrency', type=int, default=16, help='virtual users')
+    parser.add_argument('--mix', type=_parse_mix, default=DEFAULT_MIX, help='e.g. browse=60,cart=20,checkout=10,admin=10')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='earlier JSON result to compare against')
+    args = parser.parse_args()
+
+    targets = ['inprocess', 'gunicorn'] if args.target == 'both' else [args.target]
+    if 'gunicorn' in targets and importlib.util.find_spec('gunicorn') is None:
+        if args.target == 'gunicorn':
+            parser.error('gunicorn is not installed (pip install gunicorn)')
+        print("gunicorn is not installed; running in-process only")
+        targets.remove('gunicorn')
+
+    app, db_path = build_app()
+    started = time.perf_counter()
+    admin_id, customer_ids = seed_volume(app, users=args.users, products=args.products, orders=args.orders, seed=args.seed)
+    print(f"database: {db_path} ({args.users} users, {args.products} products, {args.orders} orders, "
+          f"seeded in {time.perf_counter() - started:.1f}s)")
+
+    rng = random.Random(args.seed)
+    customer_headers = [auth_headers(app, uid, 'customer') for uid in rng.sample(customer_ids, min(200, len(customer_ids)))]
+    workload = Workload(args.products, auth_headers(app, admin_id, 'admin'), customer_headers, args.mix)
+
+    results = {
+        'meta': {
+            'commit': _commit(),
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'args': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        },
+        'runs': {},
+    }
+    for name in targets:
+        target = TARGETS[name](app, db_path, args)
+        try:
+            results['runs'][name] = run(target, workload, args)
+        finally:
+            target.stop()
+        print_run(name, results['runs'][name])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
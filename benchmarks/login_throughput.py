@@ -0,0 +1,67 @@
+#benchmarks/login_throughput.py
+"""Logins per second per core for each password hashing policy.
+
+Each policy gets a fresh database with one user hashed under that policy, then
+client threads log in repeatedly for a fixed duration.
+
+    python benchmarks/login_throughput.py --seconds 5 --policies scrypt pbkdf2:sha256:600000
+"""
+
+import argparse
+import os
+import threading
+import time
+
+from common import build_app
+from models import db, User, RoleEnum
+
+DEFAULT_POLICIES = ['scrypt:16384:8:1', 'scrypt', 'pbkdf2:sha256:260000', 'pbkdf2:sha256:600000']
+
+
+def run_policy(policy, args):
+    app, _ = build_app(config={'PASSWORD_HASH_METHOD': policy, 'PASSWORD_HASH_WORKERS': args.workers})
+    with app.app_context():
+        user = User(first_name='Login', last_name='Bench', email='login@example.com', role=RoleEnum.customer)
+        user.set_password('benchmark-password')
+        db.session.add(user)
+        db.session.commit()
+
+    logins = [0] * args.threads
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(n):
+        client = app.test_client()
+        credentials = {'email': 'login@example.com', 'password': 'benchmark-password'}
+        while time.perf_counter() < deadline:
+            response = client.post('/api/login', json=credentials)
+            assert response.status_code == 200, response.get_json()
+            logins[n] += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(logins) / (time.perf_counter() - start)
+
+
+def main():
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--policies', nargs='+', default=DEFAULT_POLICIES)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--threads', type=int, default=cores * 2, help='concurrent client threads')
+    parser.add_argument('--workers', type=int, default=cores, help='PASSWORD_HASH_WORKERS')
+    args = parser.parse_args()
+
+    used = min(args.workers, cores)
+    print(f"cores: {cores}, hashing workers: {args.workers}, client threads: {args.threads}")
+    print(f"{'policy':<24} {'logins/s':>10} {'per core':>10}")
+    for policy in args.policies:
+        rate = run_policy(policy, args)
+        print(f"{policy:<24} {rate:>10.1f} {rate / used:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
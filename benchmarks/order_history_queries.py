@@ -0,0 +1,124 @@
+#benchmarks/order_history_queries.py
+"""Check that a page of order history costs the same number of queries at any history size.
+
+Gives customers histories of increasing length (each order with 1-5 lines),
+walks every page of ``GET /api/orders`` for each of them, with and without a
+status filter, and reads the statements each request ran from the
+per-endpoint ``http_request_db_queries`` histogram. ``OrderResource.get`` runs
+with a query budget in raise mode, so an N+1 regression fails the request as
+well as the comparison. Exits with code 1 if any page needs more queries than
+the smallest non-empty history did.
+
+    python benchmarks/order_history_queries.py --sizes 1 10 100 1000 --limit 50
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+
+from common import build_app, seed_catalog, auth_headers
+from models import db, User, Order, OrderItem, OrderStatusEnum, RoleEnum
+from instrumentation import request_queries, QueryBudgetExceeded
+
+ENDPOINT = 'OrderResource.get'
+BUDGET = 2  # Orders page + their items with product names
+
+
+def seed_histories(app, sizes, products, seed):
+    """One customer per history size; returns ``[(size, user_id)]``."""
+    rng = random.Random(seed)
+    statuses = list(OrderStatusEnum)
+    customers = []
+    with app.app_context():
+        start = datetime.utcnow() - timedelta(days=365)
+        next_order_id = (db.session.query(db.func.max(Order.id)).scalar() or 0) + 1
+        for size in sizes:
+            user = User(first_name='History', last_name=str(size), email=f'history_{size}@example.com',
+                        password_digest='!', role=RoleEnum.customer)
+            db.session.add(user)
+            db.session.flush()
+            orders, items = [], []
+            for n in range(size):
+                order_id = next_order_id
+                next_order_id += 1
+                lines = [(rng.randint(1, products), rng.randint(1, 3), 10) for _ in range(rng.randint(1, 5))]
+                orders.append({
+                    'id': order_id, 'user_id': user.id, 'status': rng.choice(statuses),
+                    'total_price': sum(quantity * price for _, quantity, price in lines),
+                    'created_at': start + timedelta(minutes=n), 'updated_at': start + timedelta(minutes=n),
+                })
+                items.extend({'order_id': order_id, 'product_id': product_id, 'quantity': quantity, 'price': price}
+                             for product_id, quantity, price in lines)
+            if orders:
+                db.session.execute(db.insert(Order), orders)
+                db.session.execute(db.insert(OrderItem), items)
+            customers.append((size, user.id))
+        db.session.commit()
+    return customers
+
+
+def walk(client, headers, query, limit):
+    """Request every page; returns ``(orders seen, [queries per page])``."""
+    seen, counts, cursor = 0, [], None
+    while True:
+        url = f'/api/orders?limit={limit}{query}' + (f'&cursor={cursor}' if cursor else '')
+        before = request_queries.snapshot(endpoint=ENDPOINT)['sum']
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}: {response.get_data(as_text=True)}")
+        counts.append(int(request_queries.snapshot(endpoint=ENDPOINT)['sum'] - before))
+        seen += len(response.get_json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return seen, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1, 10, 100, 1000])
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    # The revoked-token filter loads on the first request and resyncs on an interval;
+    # warm it up and keep it quiet so only the endpoint's own queries are counted
+    app, db_path = build_app(config={
+        'QUERY_BUDGETS': {ENDPOINT: BUDGET}, 'QUERY_BUDGET_MODE': 'raise', 'JOB_WORKERS': 0,
+        'JWT_BLOCKLIST_SYNC_INTERVAL': 3600.0,
+    })
+    admin_id, _ = seed_catalog(app, products=args.products)
+    customers = seed_histories(app, args.sizes, args.products, args.seed)
+    client = app.test_client()
+    client.get('/api/categories', headers=auth_headers(app, admin_id, 'admin'))
+    print(f"database: {db_path}")
+
+    failures = []
+    baseline = None
+    print(f"{'history':>8} {'filter':>10} {'orders':>7} {'pages':>6} {'queries/page':>13}")
+    for size, user_id in customers:
+        headers = auth_headers(app, user_id, 'customer')
+        for label, query in (('-', ''), ('COMPLETED', '&status=COMPLETED')):
+            try:
+                seen, counts = walk(client, headers, query, args.limit)
+            except QueryBudgetExceeded as e:
+                failures.append(f"history {size} ({label}): {e}")
+                continue
+            if not query and seen != size:
+                failures.append(f"history {size}: paged through {seen} orders")
+            if seen and baseline is None:
+                baseline = max(counts)
+            if baseline is not None and max(counts) > baseline:
+                failures.append(f"history {size} ({label}): {max(counts)} queries on a page, {baseline} for the smallest")
+            spread = f"{min(counts)}-{max(counts)}" if min(counts) != max(counts) else str(counts[0])
+            print(f"{size:>8} {label:>10} {seen:>7} {len(counts):>6} {spread:>13}")
+
+    if failures:
+        print("FAILED:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print(f"OK: at most {baseline} queries per page at every history size")
+
+
+if __name__ == '__main__':
+    main()
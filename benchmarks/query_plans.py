@@ -0,0 +1,159 @@
+#benchmarks/query_plans.py
+"""Check that the hot API queries are index lookups, not full table scans.
+
+Drives the hot endpoints of app.py and auth.py through the test client
+against a seeded database migrated to head, captures every statement they
+execute, and runs ``EXPLAIN QUERY PLAN`` on each with its real parameters.
+Any plain ``SCAN <table>`` (a full table scan) on a table not allowed for
+that endpoint is reported and the run exits with code 1, so it can gate CI.
+
+    python benchmarks/query_plans.py [--verbose]
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+
+from sqlalchemy import event
+from common import build_app, seed_catalog, auth_headers
+from models import db
+from jobs import job_queue
+
+# SQLite >= 3.36 prints "SCAN products", older versions "SCAN TABLE products"
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+ALIAS_SUFFIX = re.compile(r'_\d+$')  # ORM aliases such as products_1 in joined eager loads
+
+# Single-row bookkeeping tables; scanning them is as cheap as a lookup
+ALWAYS_ALLOWED = {'analytics'}
+
+ADMIN, CUSTOMER = 'admin', 'customer'
+
+# Error statuses that still run the query under test
+EXPECTED_ERRORS = {'cart create': 400}
+
+# (name, method, url, json body, who, tables this endpoint may legitimately scan)
+CASES = [
+    ('register', 'POST', '/api/register', {
+        'first_name': 'Plan', 'last_name': 'Check', 'email': 'plan_check@example.com', 'password': 'plan-check-pw',
+        'role': 'customer',
+    }, None, set()),
+    ('login', 'POST', '/api/login', {'email': 'plan_check@example.com', 'password': 'plan-check-pw'}, None, set()),
+    ('product list', 'GET', '/api/products?limit=20', None, CUSTOMER, set()),
+    ('product list by category', 'GET', '/api/products?limit=20&category_id=2', None, CUSTOMER, set()),
+    ('product list in stock', 'GET', '/api/products?limit=20&in_stock=true', None, CUSTOMER, set()),
+    ('product detail', 'GET', '/api/products/7', None, CUSTOMER, set()),
+    ('product search', 'GET', '/api/products/search?q=product', None, CUSTOMER, set()),
+    ('category list', 'GET', '/api/categories', None, CUSTOMER, {'categories'}),  # Returns every row
+    ('category detail', 'GET', '/api/categories/1', None, CUSTOMER, set()),
+    ('category create', 'POST', '/api/categories', {'name': 'Plan Category', 'description': 'x'}, ADMIN, set()),
+    ('cart create', 'POST', '/api/cart/create', None, CUSTOMER, set()),  # 400: the seeded customer has a cart
+    ('cart add', 'POST', '/api/cart', {'product_id': 3, 'quantity': 1}, CUSTOMER, set()),
+    ('cart batch', 'POST', '/api/cart/batch', {'operations': [
+        {'op': 'add', 'product_id': 3, 'quantity': 1}, {'op': 'set', 'product_id': 5, 'quantity': 2},
+        {'op': 'remove', 'product_id': 7},
+    ]}, CUSTOMER, set()),
+    ('cart view', 'GET', '/api/cart', None, CUSTOMER, set()),
+    ('cart clear', 'DELETE', '/api/cart', None, CUSTOMER, set()),
+    ('checkout', 'POST', '/api/orders', {
+        'billing_address': '1 Plan St', 'order_items': [{'product_id': 3, 'quantity': 2}, {'product_id': 5, 'quantity': 1}],
+    }, CUSTOMER, set()),
+    ('order history', 'GET', '/api/orders', None, CUSTOMER, set()),
+    ('order history by status', 'GET', '/api/orders?status=PENDING&limit=5', None, CUSTOMER, set()),
+    ('order detail', 'GET', '/api/orders/1', None, CUSTOMER, set()),
+    ('invoice', 'GET', '/api/invoices/1', None, CUSTOMER, set()),
+    ('admin order detail', 'GET', '/api/admin/orders/1', None, ADMIN, set()),
+    ('admin order status', 'PATCH', '/api/admin/orders/1', {'status': 'COMPLETED'}, ADMIN, set()),
+    ('admin order export', 'GET', '/api/admin/orders/export?start=2000-01-01', None, ADMIN, set()),
+    ('analytics', 'GET', '/api/analytics', None, ADMIN, set()),
+    ('product analytics', 'GET', '/api/analytics/products/3', None, ADMIN, set()),
+]
+
+
+def capture(engines):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH')):
+            statements.append((statement, parameters))
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def full_scans(connection, tables, statement, parameters):
+    plan = connection.execute('EXPLAIN QUERY PLAN ' + statement, parameters or ()).fetchall()
+    details = [row[3] for row in plan]
+    # Subqueries also show up as SCAN once materialized; only stored tables count
+    subqueries = {m.group(1) for m in map(SUBQUERY.match, details) if m}
+    scans = set()
+    for m in map(FULL_SCAN.match, details):
+        if m and m.group(1) not in subqueries:
+            name = m.group(1)
+            scans.add(name if name in tables else ALIAS_SUFFIX.sub('', name))
+    return scans, details
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+
+    # A reader bind would only duplicate the plans; check the one database. Jobs
+    # queued by the requests are drained below rather than by worker threads
+    app, db_path = build_app(config={'DB_READ_ROUTING': False, 'JOB_WORKERS': 0})
+    admin_id, customer_id = seed_catalog(app, products=args.products)
+    headers = {ADMIN: auth_headers(app, admin_id, ADMIN), CUSTOMER: auth_headers(app, customer_id, CUSTOMER)}
+    with app.app_context():
+        statements = capture(db.engines.values())
+
+    client = app.test_client()
+    connection = sqlite3.connect(db_path)
+    tables = {name for (name,) in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    def check(name, allowed):
+        problems = []
+        for statement, parameters in statements:
+            scans, details = full_scans(connection, tables, statement, parameters)
+            scans -= allowed | ALWAYS_ALLOWED
+            if scans:
+                problems.append((scans, statement, details))
+            if args.verbose:
+                print(f"  {' '.join(statement.split())[:100]}\n    " + '\n    '.join(details))
+
+        for scans, statement, details in problems:
+            print(f"FAIL {name}: full scan of {', '.join(sorted(scans))}")
+            print(f"     {' '.join(statement.split())[:160]}")
+            print('     ' + '; '.join(details))
+        if not problems:
+            print(f"ok   {name} ({len(statements)} statements)")
+        return bool(problems)
+
+    failures = 0
+    for name, method, url, body, who, allowed in CASES:
+        del statements[:]
+        response = client.open(url, method=method, json=body, headers=headers.get(who, {}))
+        if response.status_code >= 400 and response.status_code != EXPECTED_ERRORS.get(name):
+            print(f"FAIL {name}: {method} {url} returned {response.status_code}")
+            failures += 1
+            continue
+        failures += check(name, allowed)
+
+    # Background work: the jobs queued by checkout and the queue's own upkeep
+    for name, run in (('job queue drain', lambda: job_queue.drain(app)),
+                      ('job queue maintenance', app.extensions['job_queue'].maintain)):
+        del statements[:]
+        run()
+        failures += check(name, set())
+
+    if failures:
+        print(f"{failures} case(s) with full table scans")
+        sys.exit(1)
+    print("no full table scans")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#benchmarks/search_vs_like.py
+"""Compare FTS5 product search against LIKE scans on a large catalog.
+
+Seeds ``--products`` rows (100k by default) with generated names and
+descriptions, then times the same searches through the FTS5 index and through
+``LIKE '%term%'`` over name and description. The plain LIKE column stops at
+the first ``--limit`` unranked rows; "like all" is the full scan any ranked
+or counted LIKE search has to do.
+
+    python benchmarks/search_vs_like.py --products 100000 --repeat 20
+"""
+
+import argparse
+import random
+
+from common import build_app, seed_catalog, auth_headers, timed, summarize
+from models import db, Product
+from search import search_products
+
+ADJECTIVES = ['hydrating', 'matte', 'glossy', 'volumizing', 'gentle', 'intense', 'silky', 'radiant', 'repair', 'daily']
+NOUNS = ['serum', 'shampoo', 'conditioner', 'lipstick', 'mascara', 'cleanser', 'toner', 'foundation', 'balm', 'mask']
+EXTRAS = ['argan', 'vitamin', 'charcoal', 'rosewater', 'keratin', 'collagen', 'aloe', 'shea', 'niacinamide', 'retinol']
+
+QUERIES = ['serum', 'argan shampoo', 'vita', 'glossy lip', 'retinol night cream']
+
+
+def _filler_words(rng, count=5000):
+    # Pronounceable nonsense so descriptions have a realistic, mostly unique vocabulary
+    syllables = ['ka', 'lo', 'mi', 'ren', 'tu', 'sa', 'vel', 'no', 'ri', 'pa', 'zen', 'do']
+    return [''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(count)]
+
+
+def seed_products(app, count, seed):
+    rng = random.Random(seed)
+    filler = _filler_words(rng)
+    with app.app_context():
+        rows = []
+        for i in range(count):
+            name = f"{rng.choice(ADJECTIVES).title()} {rng.choice(EXTRAS).title()} {rng.choice(NOUNS).title()}"
+            words = [rng.choice(filler) for _ in range(18)] + [rng.choice(EXTRAS), rng.choice(NOUNS)]
+            rng.shuffle(words)
+            description = ' '.join(words)
+            rows.append({'id': i + 1, 'name': name, 'description': description})
+        # Rename the seeded catalog in bulk; the FTS triggers index every row
+        db.session.execute(db.update(Product), rows)
+        db.session.commit()
+
+
+def like_query(text):
+    query = Product.query
+    for word in text.split():
+        pattern = f'%{word}%'
+        query = query.filter(db.or_(Product.name.like(pattern), Product.description.like(pattern)))
+    return query
+
+
+def like_search(text, limit):
+    # Unranked: stops as soon as it has found ``limit`` rows, so common words look cheap
+    return like_query(text).order_by(Product.id).limit(limit).all()
+
+
+def like_count(text):
+    # What any ranked or counted LIKE search pays: a scan of the whole table
+    return like_query(text).count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    app, db_path = build_app()
+    _, customer_id = seed_catalog(app, products=args.products)
+    seed_products(app, args.products, args.seed)
+    headers = auth_headers(app, customer_id, 'customer')
+    client = app.test_client()
+
+    print(f"database: {db_path} ({args.products} products)")
+    print(f"{'query':<22} {'fts p50 ms':>11} {'like p50 ms':>12} {'like all ms':>12} {'http p50 ms':>12}")
+    for text in QUERIES:
+        with app.app_context():
+            fts = summarize(timed(lambda: search_products(text, args.limit), args.repeat))
+            like = summarize(timed(lambda: like_search(text, args.limit), args.repeat))
+            like_all = summarize(timed(lambda: like_count(text), args.repeat))
+        http = summarize(timed(
+            lambda: client.get('/api/products/search', query_string={'q': text, 'limit': args.limit}, headers=headers),
+            args.repeat,
+        ))
+        print(f"{text:<22} {fts['p50_ms']:>11} {like['p50_ms']:>12} {like_all['p50_ms']:>12} {http['p50_ms']:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#benchmarks/serialization.py
+"""Compare row serialization throughput: to_dict + jsonify vs. RowSchema.
+
+Seeds ``--products`` products and serializes all of them repeatedly through
+each path inside a request context, reporting rows/sec:
+
+* ``to_dict``: ORM instances, ``to_dict()`` per row, Flask ``jsonify``
+* ``schema``: column rows through ``product_schema`` and ``dumps``
+* ``schema (json)``: the same with the stdlib encoder instead of orjson
+* ``stream``: ``stream_rows`` with ``yield_per``, body fully consumed
+
+    python benchmarks/serialization.py --products 50000 --repeat 5
+"""
+
+import argparse
+
+from flask import jsonify
+from common import build_app, seed_catalog, timed, summarize
+from models import db, Product
+import serializers
+from serializers import product_schema, json_response, stream_rows
+
+
+def to_dict_path():
+    return jsonify([product.to_dict() for product in Product.query.order_by(Product.id).all()]).get_data()
+
+
+def schema_path():
+    rows = db.session.execute(product_schema.select().order_by(Product.id))
+    return json_response(product_schema.dump(rows)).get_data()
+
+
+def stream_path():
+    response = stream_rows(product_schema, product_schema.select().order_by(Product.id))
+    return b''.join(response.response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app, db_path = build_app()
+    seed_catalog(app, products=args.products)
+    print(f"database: {db_path} ({args.products} products, orjson {'on' if serializers.orjson else 'missing'})")
+
+    with app.test_request_context('/api/products'):
+        assert to_dict_path() and schema_path() and stream_path()  # Warm up
+        paths = [('to_dict', to_dict_path), ('schema', schema_path), ('stream', stream_path)]
+        results = [(name, summarize(timed(fn, args.repeat))) for name, fn in paths]
+
+        fast_encoder, serializers.orjson = serializers.orjson, None
+        try:
+            results.insert(2, ('schema (json)', summarize(timed(schema_path, args.repeat))))
+        finally:
+            serializers.orjson = fast_encoder
+
+    baseline = results[0][1]['p50_ms']
+    print(f"{'path':<15} {'p50 ms':>10} {'rows/sec':>12} {'speedup':>8}")
+    for name, stats in results:
+        rate = args.products / (stats['p50_ms'] / 1000)
+        print(f"{name:<15} {stats['p50_ms']:>10} {rate:>12,.0f} {baseline / stats['p50_ms']:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#benchmarks/sqlite_profiles.py
+"""Compare read and write throughput across the SQLite pragma profiles.
+
+Each profile gets a fresh database. Reader threads page through the product
+listing and fetch single products while writer threads place checkouts, all
+through the test client, for a fixed duration.
+
+    python benchmarks/sqlite_profiles.py --seconds 5 --readers 4 --writers 2
+"""
+
+import argparse
+import random
+import threading
+import time
+from collections import Counter
+
+from common import build_app, seed_catalog, auth_headers
+from sqlite_tuning import PROFILES
+
+
+def run_profile(profile, args):
+    app, _ = build_app(config={'SQLITE_PROFILE': profile, 'ANALYTICS_FLUSH_INTERVAL': 1.0})
+    _, customer_id = seed_catalog(app, products=args.products, stock=10 ** 9)
+    headers = auth_headers(app, customer_id, 'customer')
+    counts = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def reader(n):
+        rng = random.Random(n)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            if rng.random() < 0.5:
+                response = client.get('/api/products?limit=50', headers=headers)
+            else:
+                response = client.get(f'/api/products/{rng.randint(1, args.products)}', headers=headers)
+            with lock:
+                counts['reads' if response.status_code == 200 else 'read_errors'] += 1
+
+    def writer(n):
+        rng = random.Random(1000 + n)
+        client = app.test_client()
+        while time.perf_counter() < deadline:
+            payload = {
+                'billing_address': '1 Profile Road',
+                'order_items': [{'product_id': rng.randint(1, args.products), 'quantity': 1} for _ in range(3)],
+            }
+            response = client.post('/api/orders', json=payload, headers=headers)
+            with lock:
+                counts['writes' if response.status_code == 201 else 'write_errors'] += 1
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counts, app.extensions['sqlite_pragmas'][None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', nargs='+', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--products', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'reads/s':>10} {'writes/s':>10} {'errors':>8}  pragmas")
+    for profile in args.profiles:
+        counts, pragmas = run_profile(profile, args)
+        errors = counts['read_errors'] + counts['write_errors']
+        print(f"{profile:<12} {counts['reads'] / args.seconds:>10.1f} {counts['writes'] / args.seconds:>10.1f} "
+              f"{errors:>8}  {pragmas}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#blocklist.py
+
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert
+from models import db, RevokedToken
+from metrics import registry
+
+blocklist_checks = registry.counter(
+    'token_blocklist_checks_total', 'Token revocation checks by how they were answered', ['result']
+)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings; no false negatives, tunable false positives."""
+
+    def __init__(self, capacity=100000, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing from one blake2b digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class MemoryBlocklist:
+    # Process-local backend; only suitable for a single worker or tests
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._entries[jti] = expires_at
+
+    def contains(self, jti, now):
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > now
+
+    def active(self, now):
+        with self._lock:
+            return [jti for jti, expires_at in self._entries.items() if expires_at > now]
+
+    def since(self, watermark):
+        return [], watermark
+
+    def purge(self, now):
+        with self._lock:
+            expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+            for jti in expired:
+                del self._entries[jti]
+            return len(expired)
+
+
+class SQLiteBlocklist:
+    # Shared across workers through the revoked_tokens table (indexed on jti and expires_at)
+
+    purge_batch_size = 1000
+
+    def add(self, jti, expires_at):
+        db.session.execute(
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at, created_at=datetime.utcnow())
+            .on_conflict_do_nothing(index_elements=['jti'])
+        )
+        db.session.commit()
+
+    def contains(self, jti, now):
+        return db.session.query(
+            db.session.query(RevokedToken.id)
+            .filter(RevokedToken.jti == jti, RevokedToken.expires_at > now)
+            .exists()
+        ).scalar()
+
+    def active(self, now):
+        return [jti for (jti,) in db.session.query(RevokedToken.jti).filter(RevokedToken.expires_at > now)]
+
+    def since(self, watermark):
+        # Revocations made by any worker after the given row id; the table is
+        # AUTOINCREMENT, so ids freed by a purge are never reused below a watermark
+        rows = (
+            db.session.query(RevokedToken.id, RevokedToken.jti)
+            .filter(RevokedToken.id > watermark)
+            .order_by(RevokedToken.id)
+            .all()
+        )
+        return [jti for _, jti in rows], (rows[-1][0] if rows else watermark)
+
+    def purge(self, now):
+        # Bounded batches keep each delete's write lock short
+        purged = 0
+        while True:
+            batch = (
+                db.select(RevokedToken.id)
+                .where(RevokedToken.expires_at <= now)
+                .limit(self.purge_batch_size)
+                .scalar_subquery()
+            )
+            deleted = db.session.execute(
+                db.delete(RevokedToken).where(RevokedToken.id.in_(batch)).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            purged += deleted
+            if deleted < self.purge_batch_size:
+                return purged
+
+
+BACKENDS = {
+    'memory': MemoryBlocklist,
+    'sqlite': SQLiteBlocklist,
+}
+
+
+class TokenBlocklist:
+    """Revoked-token store with a per-process Bloom filter in front of the backend.
+
+    A jti that is not in the filter was certainly not revoked as of the last sync,
+    so the common case never touches storage. The filter picks up revocations from
+    other workers every ``sync_interval`` seconds and is rebuilt after expired
+    entries are purged.
+    """
+
+    def __init__(self, backend, sync_interval=1.0, purge_interval=300.0, capacity=100000, error_rate=0.001):
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self.purge_interval = purge_interval
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._watermark = 0
+        self._next_sync = 0.0
+        self._next_purge = time.monotonic() + purge_interval
+
+    def _rebuild(self, now):
+        # Watermark first: a revocation committed between the two reads is then either
+        # in the active list or above the watermark, so the next sync picks it up
+        _, watermark = self.backend.since(self._watermark)
+        active = self.backend.active(now)
+        self._bloom = BloomFilter(max(self.capacity, 2 * len(active)), self.error_rate)
+        for jti in active:
+            self._bloom.add(jti)
+        self._watermark = watermark
+
+    def _maintain(self):
+        clock = time.monotonic()
+        if self._bloom is not None and clock < self._next_sync:
+            return
+        with self._lock:
+            if self._bloom is not None and clock < self._next_sync:
+                return
+            now = datetime.utcnow()
+            if self._bloom is None or clock >= self._next_purge:
+                if self._bloom is not None:
+                    self.backend.purge(now)
+                    self._next_purge = clock + self.purge_interval
+                self._rebuild(now)
+            else:
+                new, self._watermark = self.backend.since(self._watermark)
+                for jti in new:
+                    self._bloom.add(jti)
+                if self._bloom.count > self._bloom.capacity:
+                    self._rebuild(now)  # Grow before the false-positive rate degrades
+            self._next_sync = clock + self.sync_interval
+
+    def revoke(self, jti, expires_at):
+        self.backend.add(jti, expires_at)
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+
+    def is_revoked(self, jti):
+        self._maintain()
+        if jti not in self._bloom:
+            blocklist_checks.inc(result='filtered')
+            return False
+        blocklist_checks.inc(result='storage')
+        return self.backend.contains(jti, datetime.utcnow())
+
+
+def init_app(app):
+    app.config.setdefault('JWT_BLOCKLIST_BACKEND', 'sqlite')
+    app.config.setdefault('JWT_BLOCKLIST_SYNC_INTERVAL', 1.0)
+    app.config.setdefault('JWT_BLOCKLIST_PURGE_INTERVAL', 300.0)
+    app.config.setdefault('JWT_BLOCKLIST_BLOOM_CAPACITY', 100000)
+    app.config.setdefault('JWT_BLOCKLIST_BLOOM_ERROR_RATE', 0.001)
+
+    # Either a registered backend name or a ready-made backend object
+    backend = app.config['JWT_BLOCKLIST_BACKEND']
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown JWT_BLOCKLIST_BACKEND {backend!r}; choose from {', '.join(BACKENDS)}")
+        backend = BACKENDS[backend]()
+
+    app.extensions['token_blocklist'] = TokenBlocklist(
+        backend,
+        sync_interval=app.config['JWT_BLOCKLIST_SYNC_INTERVAL'],
+        purge_interval=app.config['JWT_BLOCKLIST_PURGE_INTERVAL'],
+        capacity=app.config['JWT_BLOCKLIST_BLOOM_CAPACITY'],
+        error_rate=app.config['JWT_BLOCKLIST_BLOOM_ERROR_RATE'],
+    )
+
+
+def get_blocklist(app=None):
+    return (app or current_app).extensions['token_blocklist']
@@ -0,0 +1,244 @@
+#carts.py
+
+import atexit
+import logging
+import os
+import threading
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Product, Cart, CartItem
+from metrics import registry
+from errors import RequestError
+
+logger = logging.getLogger(__name__)
+
+CART_OPERATIONS = ('add', 'set', 'remove')
+MAX_CART_OPERATIONS = 500
+
+
+class CartError(RequestError):
+    pass
+
+
+def _parse_operations(operations):
+    if not isinstance(operations, list) or not operations:
+        raise CartError("operations must be a non-empty list")
+    if len(operations) > MAX_CART_OPERATIONS:
+        raise CartError(f"At most {MAX_CART_OPERATIONS} operations per request")
+    parsed = []
+    for index, operation in enumerate(operations):
+        try:
+            op = operation['op']
+            product_id = int(operation['product_id'])
+            quantity = int(operation['quantity']) if op != 'remove' else 0
+        except (KeyError, TypeError, ValueError):
+            raise CartError(f"Operation {index} needs op, an integer product_id and, unless removing, a quantity")
+        if op not in CART_OPERATIONS:
+            raise CartError(f"Operation {index}: op must be one of {', '.join(CART_OPERATIONS)}")
+        if op == 'add' and quantity < 1:
+            raise CartError(f"Operation {index}: quantity to add must be at least 1")
+        if op == 'set' and quantity < 0:
+            raise CartError(f"Operation {index}: quantity cannot be negative")
+        parsed.append((op, product_id, quantity))
+    return parsed
+
+
+def _fold(operations):
+    """Collapse the operations on each product into one final effect.
+
+    Returns ``{product_id: (kind, quantity)}`` where kind is ``'add'`` (add to
+    whatever is in the cart), ``'set'`` or ``'remove'``, so each product needs one
+    statement however many operations mention it.
+    """
+    effects = {}
+    for op, product_id, quantity in operations:
+        if op == 'set' and quantity == 0:
+            op = 'remove'
+        previous = effects.get(product_id)
+        if op != 'add' or previous is None:
+            effects[product_id] = (op, quantity)
+        elif previous[0] == 'remove':
+            effects[product_id] = ('set', quantity)
+        else:
+            effects[product_id] = (previous[0], previous[1] + quantity)
+    return effects
+
+
+def _upsert(cart_id, rows, accumulate):
+    # One executemany INSERT ... ON CONFLICT(cart_id, product_id) DO UPDATE
+    stmt = insert(CartItem)
+    quantity = CartItem.quantity + stmt.excluded.quantity if accumulate else stmt.excluded.quantity
+    stmt = stmt.on_conflict_do_update(index_elements=['cart_id', 'product_id'], set_={'quantity': quantity})
+    db.session.execute(stmt, [{'cart_id': cart_id, 'product_id': pid, 'quantity': qty} for pid, qty in rows])
+
+
+def apply_cart_operations(cart, operations):
+    """Apply a list of add/set/remove operations to ``cart`` in one transaction.
+
+    Products are checked with a single ``IN`` query; adds and sets are written as
+    upserts on the unique ``(cart_id, product_id)`` index, so repeating an add
+    never creates a duplicate line, and removals are one ``DELETE``. Nothing is
+    written if any operation is invalid. Raises ``CartError``.
+    """
+    effects = _fold(_parse_operations(operations))
+
+    wanted = [pid for pid, (kind, _) in effects.items() if kind != 'remove']
+    known = {pid for (pid,) in db.session.query(Product.id).filter(Product.id.in_(wanted))} if wanted else set()
+    missing = sorted(set(wanted) - known)
+    if missing:
+        raise CartError("Some products do not exist", 404, missing_product_ids=missing)
+
+    try:
+        adds = [(pid, qty) for pid, (kind, qty) in effects.items() if kind == 'add']
+        sets = [(pid, qty) for pid, (kind, qty) in effects.items() if kind == 'set']
+        removes = [pid for pid, (kind, _) in effects.items() if kind == 'remove']
+        if adds:
+            _upsert(cart.id, adds, accumulate=True)
+        if sets:
+            _upsert(cart.id, sets, accumulate=False)
+        if removes:
+            db.session.execute(
+                db.delete(CartItem)
+                .where(CartItem.cart_id == cart.id, CartItem.product_id.in_(removes))
+                .execution_options(synchronize_session=False)
+            )
+        touch_cart(cart.id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    db.session.expire_all()  # Bulk statements bypass the identity map
+
+
+purged_items = registry.counter('cart_items_purged_total', 'Items removed from abandoned carts by the sweeper')
+
+
+def touch_cart(cart_id):
+    # Cart age, as seen by the sweeper, is the time of the last change to its items
+    db.session.execute(db.update(Cart).where(Cart.id == cart_id).values(updated_at=datetime.utcnow()))
+
+
+def clear_cart(user_id):
+    """Empty the user's cart with a single set-based ``DELETE``; returns the number of items removed."""
+    carts = db.select(Cart.id).where(Cart.user_id == user_id).scalar_subquery()
+    try:
+        removed = db.session.execute(
+            db.delete(CartItem).where(CartItem.cart_id.in_(carts)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.execute(db.update(Cart).where(Cart.user_id == user_id).values(updated_at=datetime.utcnow()))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return removed
+
+
+def purge_abandoned_carts(older_than, batch_size=1000, max_batches=None):
+    """Delete the items of carts not changed since ``older_than`` (a datetime).
+
+    Works in batches of ``batch_size`` items, each its own short transaction, so
+    the sweep never holds SQLite's write lock for long; stops after ``max_batches``
+    when given. Cart rows are kept, so their owners can keep using them. Returns
+    the number of items deleted.
+    """
+    stale = db.select(Cart.id).where(Cart.updated_at < older_than)
+    purged = batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = (
+            db.select(CartItem.id)
+            .where(CartItem.cart_id.in_(stale.scalar_subquery()))
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        deleted = db.session.execute(
+            db.delete(CartItem).where(CartItem.id.in_(batch)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        purged += deleted
+        batches += 1
+        if deleted < batch_size:
+            break
+    if purged:
+        purged_items.inc(purged)
+    return purged
+
+
+class _Sweeper:
+    # Per-app state: the background thread that empties abandoned carts
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config['CART_SWEEP_INTERVAL']
+        self.lock = threading.Lock()
+        self.pid = None
+        self.stop = threading.Event()
+        atexit.register(self.stop.set)
+
+    def ensure_running(self):
+        # Started lazily on the first request (and again after a fork) so CLI
+        # commands and the gunicorn master never sweep
+        if self.pid == os.getpid() or self.interval <= 0:
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        threading.Thread(target=self._run, name='cart-sweeper', daemon=True).start()
+
+    def _run(self):
+        while not self.stop.wait(self.interval):
+            self.sweep()
+
+    def sweep(self):
+        config = self.app.config
+        try:
+            with self.app.app_context():
+                return purge_abandoned_carts(
+                    datetime.utcnow() - config['CART_ABANDONED_AFTER'],
+                    batch_size=config['CART_SWEEP_BATCH_SIZE'],
+                    max_batches=config['CART_SWEEP_MAX_BATCHES'],
+                )
+        except Exception:
+            # The next run picks up where this one failed
+            logger.exception("Failed to sweep abandoned carts")
+            return 0
+
+
+class CartSweeper:
+    """Background purge of abandoned cart items.
+
+    Every ``CART_SWEEP_INTERVAL`` seconds (0 disables it) each worker deletes up to
+    ``CART_SWEEP_MAX_BATCHES`` batches of ``CART_SWEEP_BATCH_SIZE`` items from carts
+    untouched for ``CART_ABANDONED_AFTER``. Sweeps are idempotent, so workers
+    sweeping concurrently only wait on each other's write lock. ``flask
+    sweep-carts`` runs one full sweep, e.g. from cron with the thread disabled.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('CART_SWEEP_INTERVAL', 3600.0)
+        app.config.setdefault('CART_ABANDONED_AFTER', timedelta(days=30))
+        app.config.setdefault('CART_SWEEP_BATCH_SIZE', 1000)
+        app.config.setdefault('CART_SWEEP_MAX_BATCHES', 100)
+        sweeper = app.extensions['cart_sweeper'] = _Sweeper(app)
+        app.before_request(sweeper.ensure_running)
+
+        @app.cli.command('sweep-carts')
+        @click.option('--days', type=float, default=None, help='Abandoned after this many days (default: CART_ABANDONED_AFTER)')
+        @click.option('--batch-size', type=int, default=None, help='Items per delete (default: CART_SWEEP_BATCH_SIZE)')
+        def sweep_carts_command(days, batch_size):
+            """Delete the items of abandoned carts."""
+            older_than = datetime.utcnow() - (timedelta(days=days) if days is not None else app.config['CART_ABANDONED_AFTER'])
+            purged = purge_abandoned_carts(older_than, batch_size=batch_size or app.config['CART_SWEEP_BATCH_SIZE'])
+            click.echo(f"Removed {purged} items from carts untouched since {older_than:%Y-%m-%d %H:%M}")
+
+    def sweep(self, app=None):
+        return (app or current_app).extensions['cart_sweeper'].sweep()
+
+
+cart_sweeper = CartSweeper()
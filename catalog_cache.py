@@ -0,0 +1,87 @@
+#catalog_cache.py
+
+import threading
+from collections import OrderedDict
+from flask import current_app
+from metrics import registry
+
+catalog_cache_requests = registry.counter(
+    'catalog_cache_requests_total', 'Catalog cache lookups by result', ['result']
+)
+catalog_cache_bytes = registry.gauge('catalog_cache_bytes', 'Bytes of serialized responses held by the catalog cache')
+
+# Response headers worth replaying from the cache (pagination links, content type)
+CACHED_HEADERS = ('Content-Type', 'X-Next-Cursor', 'Link')
+
+
+class CatalogCache:
+    """LRU of pre-serialized catalog responses, bounded by a byte budget.
+
+    Each entry remembers the ``catalog_versions`` it was rendered under and is only
+    served while those versions are still current, so a write in any worker
+    (which bumps the shared version row) retires it everywhere. Local write paths
+    additionally drop their entries eagerly through ``invalidate``.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (versions, body, headers, cost)
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != versions:
+                catalog_cache_requests.inc(result='miss' if entry is None else 'stale')
+                return None
+            self._entries.move_to_end(key)
+            catalog_cache_requests.inc(result='hit')
+            return entry[1], entry[2]
+
+    def put(self, key, versions, body, headers):
+        cost = len(body) + len(key) + sum(len(k) + len(v) for k, v in headers)
+        if cost > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= old[3]
+            self._entries[key] = (versions, body, headers, cost)
+            self.size += cost
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted[3]
+                catalog_cache_requests.inc(result='evicted')
+
+    def invalidate(self, *names):
+        # Drop every entry rendered from any of the given catalog tables
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if set(entry[0]) & set(names)]:
+                self.size -= self._entries.pop(key)[3]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+def init_app(app):
+    app.config.setdefault('CATALOG_CACHE_ENABLED', True)
+    app.config.setdefault('CATALOG_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    cache = CatalogCache(app.config['CATALOG_CACHE_MAX_BYTES'])
+    app.extensions['catalog_cache'] = cache
+    catalog_cache_bytes.set_function(lambda: cache.size)
+
+
+def get_catalog_cache(app=None):
+    app = app or current_app
+    if not app.config['CATALOG_CACHE_ENABLED']:
+        return None
+    return app.extensions['catalog_cache']
+
+
+def invalidate(*names):
+    cache = get_catalog_cache()
+    if cache is not None:
+        cache.invalidate(*names)
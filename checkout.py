@@ -0,0 +1,102 @@
+#checkout.py
+
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import insert
+from models import db, Product, Order, OrderItem, Invoice, Analytics, OrderStatusEnum
+from stock import reserve_stock, InsufficientStock
+from rollups import record_sales
+import jobs
+from errors import RequestError
+
+
+class CheckoutError(RequestError):
+    pass
+
+
+def _parse_lines(order_items):
+    lines = []
+    for item_data in order_items or []:
+        try:
+            product_id = int(item_data['product_id'])
+            quantity = int(item_data['quantity'])
+        except (KeyError, TypeError, ValueError):
+            raise CheckoutError("Each order item needs an integer product_id and quantity")
+        if quantity < 1:
+            raise CheckoutError(f"Quantity for product {product_id} must be at least 1")
+        lines.append((product_id, quantity))
+    if not lines:
+        raise CheckoutError("Order must contain at least one item")
+    return lines
+
+
+def place_order(user_id, order_items, billing_address):
+    """Create an order with its items and invoice in one transaction.
+
+    All referenced products are priced with a single ``IN`` query, stock is reserved
+    with one guarded update and the order lines are written with one executemany
+    insert. Analytics, rollups and the invoice document are left to jobs queued in
+    the same transaction. Nothing is persisted if any line is invalid or out of stock.
+    Returns ``(order, invoice)``; raises ``CheckoutError`` for bad input or missing stock.
+    """
+    if not billing_address:
+        raise CheckoutError("Billing address is required")
+    lines = _parse_lines(order_items)
+
+    product_ids = {product_id for product_id, _ in lines}
+    prices = dict(
+        db.session.query(Product.id, Product.price).filter(Product.id.in_(product_ids)).all()
+    )
+    for product_id, _ in lines:
+        if product_id not in prices:
+            raise CheckoutError(f"Product with ID {product_id} not found", 404)
+
+    total_price = sum((Decimal(prices[product_id]) * quantity for product_id, quantity in lines), Decimal('0'))
+
+    try:
+        # First write of the transaction; stock is reserved only if every line fits
+        reserve_stock(lines)
+
+        now = datetime.utcnow()
+        order = Order(user_id=user_id, total_price=total_price, status=OrderStatusEnum.PENDING,
+                      created_at=now, updated_at=now)
+        db.session.add(order)
+        db.session.flush()  # Assigns order.id without committing
+
+        db.session.execute(insert(OrderItem), [
+            {'order_id': order.id, 'product_id': product_id, 'quantity': quantity, 'price': prices[product_id]}
+            for product_id, quantity in lines
+        ])
+
+        invoice = Invoice(order_id=order.id, billing_address=billing_address, total_amount=total_price)
+        db.session.add(invoice)
+        db.session.flush()  # Assigns invoice.id for the render job
+
+        # Off the checkout path; committed (or rolled back) with the order
+        jobs.enqueue('order.analytics', {'order_id': order.id}, key=f'order.analytics:{order.id}')
+        jobs.enqueue('invoice.render', {'invoice_id': invoice.id}, key=f'invoice.render:{invoice.id}')
+        db.session.commit()
+    except InsufficientStock as e:
+        db.session.rollback()
+        raise CheckoutError("Insufficient stock", 409, shortages=e.shortages)
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return order, invoice
+
+
+@jobs.handler('order.analytics')
+def record_order_analytics(payload):
+    """Add a placed order to the shop totals and the product rollups."""
+    order = db.session.get(Order, payload['order_id'])
+    if order is None:
+        return
+    lines = (
+        db.session.query(OrderItem.product_id, OrderItem.quantity, OrderItem.price)
+        .filter(OrderItem.order_id == order.id)
+        .all()
+    )
+    Analytics.update_total_orders_and_revenue(order.total_price, commit=False)
+    record_sales(lines, order.created_at.date())
+    Analytics.update_most_purchased_product(commit=False)
@@ -0,0 +1,114 @@
+#conditional.py
+
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, Response
+from models import db, CatalogVersion
+from catalog_cache import get_catalog_cache, CACHED_HEADERS
+
+
+def catalog_versions(*names):
+    """Current ``{name: (version, updated_at)}`` for the given catalog tables, one PK lookup each."""
+    rows = db.session.query(CatalogVersion.name, CatalogVersion.version, CatalogVersion.updated_at) \
+        .filter(CatalogVersion.name.in_(names)).all()
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def _etag(versions):
+    # Same catalog versions + same URL (path and query string) = same bytes
+    key = '|'.join(f'{name}:{version}' for name, (version, _) in sorted(versions.items()))
+    key += '|' + request.full_path
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110 13.2.2)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def _settled(last_modified):
+    # Dates only have one-second resolution, so a change made in the current second
+    # could still be followed by another one in the same second. Only send a date
+    # once its second is over: a client can then never hold a Last-Modified that a
+    # later write shares, and validates with the ETag until then
+    return datetime.utcnow() - last_modified >= timedelta(seconds=1)
+
+
+def _render(fn, args, kwargs, versions, on_serve):
+    # Serve from the catalog cache when the versions still match, else render and store
+    cache = get_catalog_cache()
+    key = request.full_path
+    if cache is not None:
+        hit = cache.get(key, versions)
+        if hit is not None:
+            body, headers = hit
+            if on_serve:
+                on_serve(**kwargs)
+            return Response(body, status=200, headers=list(headers))
+
+    response = fn(*args, **kwargs)
+    if not isinstance(response, Response) or response.status_code != 200:
+        return response
+    if on_serve:
+        on_serve(**kwargs)
+    if cache is not None and not response.is_streamed:
+        headers = tuple((name, response.headers[name]) for name in CACHED_HEADERS if name in response.headers)
+        cache.put(key, versions, response.get_data(), headers)
+    return response
+
+
+def row_exists(model, arg):
+    """An ``exists`` check for ``conditional_get``: is the row named by URL argument ``arg`` still there?
+
+    Views without the argument (listings) always pass.
+    """
+    def check(**kwargs):
+        value = kwargs.get(arg)
+        if value is None:
+            return True
+        return db.session.query(db.session.query(model.id).filter(model.id == value).exists()).scalar()
+    return check
+
+
+def conditional_get(*names, on_serve=None, exists=None):
+    """Answer catalog GETs with ``304 Not Modified`` when the client's copy is current.
+
+    The strong ETag and Last-Modified come from the ``catalog_versions`` rows of
+    ``names``, so a revalidation costs one indexed lookup and skips both the query
+    and the serialization of the payload. Full responses are served from the
+    in-process catalog cache while those versions are unchanged. ``on_serve`` is called
+    with the view's URL arguments for every 200 and 304 response, cached or not
+    (e.g. to count product views). ``exists``, called with the same arguments,
+    is checked before answering 304, so a URL whose row is gone (or never was)
+    gets the view's own answer, e.g. 404, whatever date the client sends.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            versions = catalog_versions(*names)
+            if len(versions) != len(names):
+                return fn(*args, **kwargs)  # Not migrated yet; serve without validators or caching
+
+            etag = _etag(versions)
+            last_modified = max(updated_at for _, updated_at in versions.values())
+            if _not_modified(etag, last_modified) and (exists is None or exists(**kwargs)):
+                response = Response(status=304)
+                if on_serve:
+                    on_serve(**kwargs)  # A revalidated page is still a page view
+            else:
+                response = _render(fn, args, kwargs, versions, on_serve)
+                if not isinstance(response, Response) or response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if _settled(last_modified):
+                response.last_modified = last_modified
+            response.cache_control.no_cache = True  # Cache, but revalidate every time
+            return response
+        return wrapper
+    return decorator
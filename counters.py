@@ -0,0 +1,108 @@
+#counters.py
+
+import atexit
+import logging
+import os
+import threading
+from collections import Counter
+from flask import current_app
+from models import db, Analytics
+from rollups import record_views
+
+logger = logging.getLogger(__name__)
+
+
+class _ViewBuffer:
+    # Per-app state: pending views by product id and the background flusher
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config['ANALYTICS_FLUSH_INTERVAL']
+        self.threshold = app.config['ANALYTICS_FLUSH_THRESHOLD']
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.pid = None
+        self.stop = threading.Event()
+        atexit.register(self.shutdown)
+
+    def _ensure_flusher(self):
+        # Started lazily (and again after a fork) so CLI commands and the gunicorn
+        # master never run a flusher thread of their own
+        if self.pid == os.getpid() or self.interval <= 0:
+            return
+        self.pid = os.getpid()
+        self.pending.clear()  # Views counted by the parent belong to the parent
+        threading.Thread(target=self._run, name='view-counter-flush', daemon=True).start()
+
+    def _run(self):
+        while not self.stop.wait(self.interval):
+            self.flush()
+
+    def record(self, product_id, views=1):
+        with self.lock:
+            self._ensure_flusher()
+            self.pending[product_id] += views
+            full = sum(self.pending.values()) >= self.threshold
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, Counter()
+        if not batch:
+            return 0
+
+        views = sum(batch.values())
+        try:
+            # A fresh app context gets its own session, so flushing from inside a
+            # request never commits the request's work
+            with self.app.app_context():
+                record_views(batch)
+                Analytics.update_product_views(views)
+        except Exception:
+            # Put the views back so the next flush retries them
+            logger.exception("Failed to flush %d product views", views)
+            with self.lock:
+                self.pending.update(batch)
+            return 0
+        return views
+
+    def shutdown(self):
+        self.stop.set()
+        self.flush()
+
+
+class ViewCounter:
+    """Write-behind buffer for product views.
+
+    Views are counted in memory and written with one ``product_views + n`` update
+    every ``ANALYTICS_FLUSH_INTERVAL`` seconds, once ``ANALYTICS_FLUSH_THRESHOLD``
+    views are pending, and at interpreter exit. Set the threshold to 1 to write
+    through on every view.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ANALYTICS_FLUSH_INTERVAL', 5.0)
+        app.config.setdefault('ANALYTICS_FLUSH_THRESHOLD', 500)
+        app.extensions['view_counter'] = _ViewBuffer(app)
+
+    def _buffer(self, app=None):
+        return (app or current_app).extensions['view_counter']
+
+    def record(self, product_id, views=1):
+        self._buffer().record(product_id, views)
+
+    def flush(self, app=None):
+        return self._buffer(app).flush()
+
+    def pending(self, app=None):
+        buffer = self._buffer(app)
+        with buffer.lock:
+            return sum(buffer.pending.values())
+
+
+view_counter = ViewCounter()
@@ -0,0 +1,14 @@
+#errors.py
+
+
+class RequestError(Exception):
+    """A client error raised below the resources, answered as ``to_dict(), status_code``."""
+
+    def __init__(self, message, status_code=400, **details):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.details = details
+
+    def to_dict(self):
+        return {"message": self.message, **self.details}
@@ -0,0 +1,120 @@
+#exports.py
+
+import csv
+import io
+from datetime import datetime, timezone
+from sqlalchemy import tuple_
+from models import db, Order, OrderItem, Invoice
+from pagination import encode_cursor, decode_keyset_cursor
+from serializers import dumps, order_schema, order_item_schema, invoice_schema
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+MIMETYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# One CSV line per order item; orders without items get a single line with empty item fields
+CSV_COLUMNS = [
+    'order_id', 'user_id', 'status', 'total_price', 'created_at', 'updated_at',
+    'invoice_id', 'billing_address', 'invoice_total',
+    'item_id', 'product_id', 'quantity', 'price',
+    'cursor',
+]
+
+
+def parse_bound(value):
+    """reqparse type for ``start``/``end``: an ISO date or datetime, returned as naive UTC."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{value!r} is not an ISO 8601 date or datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def export_statement(start=None, end=None, cursor=None):
+    """Orders in ``[start, end)`` after ``cursor``, in ``(created_at, id)`` order.
+
+    Raises ``InvalidCursor`` for a malformed cursor, before anything is streamed.
+    """
+    # Same as keyset_page: a NULL key cannot be resumed from, so such rows are left out
+    statement = order_schema.select().where(Order.created_at.isnot(None)).order_by(Order.created_at, Order.id)
+    if start is not None:
+        statement = statement.where(Order.created_at >= start)
+    if end is not None:
+        statement = statement.where(Order.created_at < end)
+    if cursor:
+        values = decode_keyset_cursor(cursor, (Order.created_at, Order.id))
+        statement = statement.where(tuple_(Order.created_at, Order.id) > tuple_(*values))
+    return statement
+
+
+def _details(order_ids):
+    # Items and invoices for one batch of orders: two IN queries on indexed order_id
+    items = {}
+    for row in db.session.execute(
+        order_item_schema.select().where(OrderItem.order_id.in_(order_ids)).order_by(OrderItem.id)
+    ):
+        items.setdefault(row.order_id, []).append(order_item_schema.row(row))
+    invoices = {}
+    for row in db.session.execute(
+        invoice_schema.select().where(Invoice.order_id.in_(order_ids)).order_by(Invoice.id)
+    ):
+        invoices.setdefault(row.order_id, invoice_schema.row(row))
+    return items, invoices
+
+
+def _batches(statement, batch_size):
+    # yield_per keeps one server-side cursor open, so the whole export reads one snapshot
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        orders = order_schema.dump(partition)
+        items, invoices = _details([order['id'] for order in orders])
+        for order, row in zip(orders, partition):
+            # Resuming from this cursor continues with the next order
+            cursor = encode_cursor(row.created_at, row.id)
+            yield order, items.get(order['id'], []), invoices.get(order['id']), cursor
+
+
+def _ndjson(statement, batch_size):
+    lines = []
+    for order, items, invoice, cursor in _batches(statement, batch_size):
+        lines.append(dumps({**order, 'items': items, 'invoice': invoice, 'cursor': cursor}))
+        if len(lines) >= batch_size:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def _csv(statement, batch_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    written = 0
+    for order, items, invoice, cursor in _batches(statement, batch_size):
+        head = [
+            order['id'], order['user_id'], order['status'], order['total_price'],
+            order['created_at'].isoformat() if order['created_at'] else '',
+            order['updated_at'].isoformat() if order['updated_at'] else '',
+        ]
+        head += [invoice['id'], invoice['billing_address'], invoice['total_amount']] if invoice else ['', '', '']
+        for item in items or [None]:
+            tail = [item['id'], item['product_id'], item['quantity'], item['price']] if item else ['', '', '', '']
+            writer.writerow(head + tail + [cursor])
+        written += 1
+        if written % batch_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def export_orders(statement, fmt='ndjson', batch_size=1000):
+    """Generate the export body chunk by chunk; memory is bounded by ``batch_size`` orders.
+
+    Every NDJSON object and CSV line carries the cursor of its order; passing the
+    last fully received one back resumes the export right after that order.
+    """
+    if fmt == 'csv':
+        return _csv(statement, batch_size)
+    return _ndjson(statement, batch_size)
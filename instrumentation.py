@@ -0,0 +1,197 @@
+#instrumentation.py
+
+import json
+import logging
+import time
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+request_seconds = registry.histogram(
+    'http_request_duration_seconds', 'Request latency from first hook to last byte', ['endpoint']
+)
+request_queries = registry.histogram(
+    'http_request_db_queries', 'SQL statements executed per request', ['endpoint'], buckets=QUERY_COUNT_BUCKETS
+)
+request_sql_seconds = registry.histogram(
+    'http_request_db_seconds', 'Total SQL execution time per request', ['endpoint']
+)
+request_serialization_seconds = registry.histogram(
+    'http_request_serialization_seconds', 'Time spent encoding JSON per request', ['endpoint']
+)
+response_bytes = registry.histogram(
+    'http_response_size_bytes', 'Response body size', ['endpoint'], buckets=SIZE_BUCKETS
+)
+budget_exceeded = registry.counter(
+    'query_budget_exceeded_total', 'Requests that ran more SQL statements than their endpoint budget', ['endpoint']
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class _RequestStats:
+    __slots__ = ('endpoint', 'started', 'queries', 'sql_seconds', 'serialization_seconds', 'size', 'finished')
+
+    def __init__(self):
+        self.endpoint = None
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.size = 0
+        self.finished = False
+
+
+def _current():
+    if not has_request_context():
+        return None  # Background flushers, CLI commands, migrations
+    return g.get('_request_stats')
+
+
+def current_stats():
+    """Counters of the current request so far, or None outside a request."""
+    return _current()
+
+
+def record_serialization(seconds):
+    stats = _current()
+    if stats is not None:
+        stats.serialization_seconds += seconds
+
+
+def endpoint_name():
+    """``Resource.method`` for flask-restful views (e.g. ``CartResource.get``), else the Flask endpoint."""
+    if request.url_rule is None:
+        return 'unmatched'
+    view = current_app.view_functions.get(request.endpoint)
+    view_class = getattr(view, 'view_class', None)
+    if view_class is not None:
+        return f'{view_class.__name__}.{request.method.lower()}'
+    return request.endpoint
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    # jsonify() and app.json.dumps()
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            record_serialization(time.perf_counter() - start)
+
+
+class TimedJSONEncoder(json.JSONEncoder):
+    # flask-restful encodes dict returns with json.dumps(cls=RESTFUL_JSON['cls'])
+
+    def encode(self, obj):
+        start = time.perf_counter()
+        try:
+            return super().encode(obj)
+        finally:
+            record_serialization(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    if stats is not None:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - context._instrumentation_started
+
+
+def _check_budget(app, stats, can_raise=True):
+    budget = app.config['QUERY_BUDGETS'].get(stats.endpoint, app.config['QUERY_BUDGET_DEFAULT'])
+    if budget is None or stats.queries <= budget:
+        return
+    budget_exceeded.inc(endpoint=stats.endpoint)
+    message = f"{stats.endpoint} ran {stats.queries} SQL statements, budget is {budget}"
+    if can_raise and app.config['QUERY_BUDGET_MODE'] == 'raise':
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def _count_bytes(stats, chunks):
+    # Streamed bodies are only sized as they are sent
+    for chunk in chunks:
+        stats.size += len(chunk)
+        yield chunk
+
+
+def _finish(stats):
+    if stats.finished:
+        return
+    stats.finished = True
+    endpoint = stats.endpoint
+    request_seconds.observe(time.perf_counter() - stats.started, endpoint=endpoint)
+    request_queries.observe(stats.queries, endpoint=endpoint)
+    request_sql_seconds.observe(stats.sql_seconds, endpoint=endpoint)
+    request_serialization_seconds.observe(stats.serialization_seconds, endpoint=endpoint)
+    response_bytes.observe(stats.size, endpoint=endpoint)
+
+
+def _finish_streamed(app, stats):
+    _finish(stats)
+    _check_budget(app, stats, can_raise=False)  # Too late to fail the response
+
+
+def init_app(app, db):
+    """Record per-endpoint query count, SQL time, JSON encoding time and response size.
+
+    ``QUERY_BUDGETS`` maps endpoint names to the most SQL statements a request may
+    run (``QUERY_BUDGET_DEFAULT`` applies to the rest, ``None`` for no limit). Over
+    budget requests are logged, or raise ``QueryBudgetExceeded`` when
+    ``QUERY_BUDGET_MODE`` is ``'raise'`` so tests catch N+1 regressions.
+    Streamed responses are checked once their body has been sent, when the
+    status line is already out, so they are only logged and counted in
+    ``query_budget_exceeded_total`` in either mode.
+    """
+    app.config.setdefault('INSTRUMENTATION_ENABLED', True)
+    app.config.setdefault('QUERY_BUDGETS', {})
+    app.config.setdefault('QUERY_BUDGET_DEFAULT', None)
+    app.config.setdefault('QUERY_BUDGET_MODE', 'log')
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+    if app.config['QUERY_BUDGET_MODE'] not in ('log', 'raise'):
+        raise ValueError("QUERY_BUDGET_MODE must be 'log' or 'raise'")
+
+    app.json = TimedJSONProvider(app)
+    app.config.setdefault('RESTFUL_JSON', {}).setdefault('cls', TimedJSONEncoder)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_stats():
+        g._request_stats = _RequestStats()
+
+    @app.after_request
+    def finish_request_stats(response):
+        stats = g.get('_request_stats')
+        if stats is None:
+            return response
+        stats.endpoint = endpoint_name()
+        if response.is_streamed and not response.direct_passthrough:
+            # Observed once the body has been sent, so streamed queries and bytes count too
+            response.response = _count_bytes(stats, response.response)
+            response.call_on_close(lambda: _finish_streamed(app, stats))
+            return response
+        # send_file bodies are passed through untouched so the server can use sendfile
+        size = response.content_length if response.direct_passthrough else response.calculate_content_length()
+        stats.size = size or 0
+        _finish(stats)
+        _check_budget(app, stats)
+        return response
@@ -0,0 +1,182 @@
+#invoices.py
+
+import hashlib
+import json
+import os
+import tempfile
+from html import escape
+from flask import current_app
+from sqlalchemy.engine import make_url
+from models import db, User, Product, Order, OrderItem, Invoice
+import jobs
+
+DOCUMENT_FORMATS = ('json', 'html')
+MIMETYPES = {'json': 'application/json', 'html': 'text/html'}  # send_file adds the charset to text types
+DOCUMENT_MAX_AGE = 365 * 24 * 3600  # Content-addressed, so a URL never changes meaning
+
+HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Invoice {number}</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border-bottom: 1px solid #ccc; padding: 0.4em; text-align: left; }}
+td.amount, th.amount {{ text-align: right; }}
+@page {{ size: A4; margin: 2cm; }}
+</style>
+</head>
+<body>
+<h1>Invoice {number}</h1>
+<p>Order #{order_id}, issued {issued_at}</p>
+<p><strong>Billed to</strong><br>{customer}<br>{email}<br>{billing_address}</p>
+<table>
+<thead><tr><th>Product</th><th class="amount">Quantity</th><th class="amount">Unit price</th><th class="amount">Amount</th></tr></thead>
+<tbody>
+{lines}
+</tbody>
+<tfoot><tr><th colspan="3">Total</th><th class="amount">{total}</th></tr></tfoot>
+</table>
+</body>
+</html>
+"""
+
+LINE_TEMPLATE = '<tr><td>{name}</td><td class="amount">{quantity}</td><td class="amount">{unit_price}</td><td class="amount">{amount}</td></tr>'
+
+
+def build_document(invoice):
+    """The invoice as a plain dict: header, customer, billing address and priced lines.
+
+    Lines use the prices recorded on the order and the product names current at
+    rendering time, which for documents rendered at checkout are the names the
+    customer saw.
+    """
+    order, user = (
+        db.session.query(Order, User).join(User, User.id == Order.user_id).filter(Order.id == invoice.order_id).one()
+    )
+    lines = (
+        db.session.query(OrderItem.product_id, Product.name, OrderItem.quantity, OrderItem.price)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .filter(OrderItem.order_id == order.id)
+        .order_by(OrderItem.id)
+        .all()
+    )
+    return {
+        'number': f'INV-{invoice.id:06d}',
+        'invoice_id': invoice.id,
+        'order_id': order.id,
+        'issued_at': invoice.created_at.isoformat(),
+        'customer': {'name': f'{user.first_name} {user.last_name}', 'email': user.email},
+        'billing_address': invoice.billing_address,
+        'lines': [
+            {
+                'product_id': product_id,
+                'name': name,
+                'quantity': quantity,
+                'unit_price': str(price),
+                'amount': str(price * quantity),
+            }
+            for product_id, name, quantity, price in lines
+        ],
+        'total': str(invoice.total_amount),
+    }
+
+
+def render(document):
+    """Return ``(content_hash, {format: bytes})`` for a document from ``build_document``.
+
+    The JSON is canonical (sorted keys, fixed separators) and the HTML is derived
+    from it, so the hash of the JSON identifies both.
+    """
+    body = json.dumps(document, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    lines = '\n'.join(
+        LINE_TEMPLATE.format(
+            name=escape(line['name'] or f"Product #{line['product_id']}"),
+            quantity=line['quantity'],
+            unit_price=escape(line['unit_price']),
+            amount=escape(line['amount']),
+        )
+        for line in document['lines']
+    )
+    html = HTML_TEMPLATE.format(
+        number=escape(document['number']),
+        order_id=document['order_id'],
+        issued_at=escape(document['issued_at'][:10]),
+        customer=escape(document['customer']['name']),
+        email=escape(document['customer']['email']),
+        billing_address=escape(document['billing_address']),
+        lines=lines,
+        total=escape(document['total']),
+    ).encode('utf-8')
+    return hashlib.sha256(body).hexdigest(), {'json': body, 'html': html}
+
+
+def document_path(invoice_id, content_hash, fmt, app=None):
+    directory = (app or current_app).config['INVOICE_DOCUMENT_DIR']
+    return os.path.join(directory, str(invoice_id), f'{content_hash}.{fmt}')
+
+
+def _write(path, content):
+    # Write then rename, so a reader never sees a partial file; the same name
+    # always holds the same bytes, so concurrent writers are harmless
+    if os.path.exists(path):
+        return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def store_document(invoice):
+    """Render ``invoice`` into the document cache and record its hash on the row.
+
+    Leaves committing to the caller. Returns the content hash.
+    """
+    content_hash, bodies = render(build_document(invoice))
+    for fmt, content in bodies.items():
+        _write(document_path(invoice.id, content_hash, fmt), content)
+    if invoice.document_hash != content_hash:
+        invoice.document_hash = content_hash
+    return content_hash
+
+
+def ensure_document(invoice, fmt):
+    """Path of the cached ``fmt`` document of ``invoice``, rendering it first if needed.
+
+    Normally the ``invoice.render`` job has done the work at checkout and this is
+    an ``os.path.exists``; a missing render or a wiped cache directory is redone
+    here, at request time.
+    """
+    if invoice.document_hash:
+        path = document_path(invoice.id, invoice.document_hash, fmt)
+        if os.path.exists(path):
+            return path
+    content_hash = store_document(invoice)
+    db.session.commit()
+    return document_path(invoice.id, content_hash, fmt)
+
+
+@jobs.handler('invoice.render')
+def render_invoice(payload):
+    """Render a new invoice into the document cache, off the checkout path."""
+    invoice = db.session.get(Invoice, payload['invoice_id'])
+    if invoice is not None:
+        store_document(invoice)
+
+
+def init_app(app):
+    # Next to a file-backed SQLite database by default, so benchmark databases in
+    # temporary directories get their own cache
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+        default = os.path.join(os.path.dirname(os.path.abspath(url.database)), 'invoice_documents')
+    else:
+        default = os.path.join(app.instance_path, 'invoice_documents')
+    app.config.setdefault('INVOICE_DOCUMENT_DIR', default)
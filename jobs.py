@@ -0,0 +1,331 @@
+#jobs.py
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+import click
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Job, JobStatusEnum
+from routing import RoutingSession
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+PENDING, RUNNING, DONE, FAILED = JobStatusEnum.PENDING, JobStatusEnum.RUNNING, JobStatusEnum.DONE, JobStatusEnum.FAILED
+
+queue_depth = registry.gauge('job_queue_depth', 'Jobs in the outbox by status', ['status'])
+queue_lag = registry.gauge('job_queue_lag_seconds', 'How long the oldest due job has been waiting')
+jobs_processed = registry.counter('jobs_processed_total', 'Job runs by outcome (done, retry, failed)', ['kind', 'outcome'])
+job_seconds = registry.histogram('job_duration_seconds', 'Time spent running a job', ['kind'])
+
+
+def handler(kind):
+    """Register ``fn(payload)`` as the handler of ``kind`` jobs.
+
+    Handlers write through ``db.session`` without committing: the runner commits
+    their writes together with marking the job done, so a job that fails or is
+    retried never applies its database changes twice. Side effects outside the
+    database (files, emails) must be safe to repeat.
+    """
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue(kind, payload=None, key=None, delay=0, max_attempts=None):
+    """Add a job to the outbox in the caller's transaction.
+
+    The job only becomes visible, and the workers are only woken, once the caller
+    commits, so work is never queued for a transaction that rolled back. A job
+    whose ``key`` was already used is silently dropped.
+    """
+    now = datetime.utcnow()
+    db.session.execute(
+        insert(Job)
+        .values(
+            kind=kind,
+            payload=json.dumps(payload or {}),
+            idempotency_key=key,
+            status=PENDING,
+            attempts=0,
+            max_attempts=max_attempts or current_app.config['JOB_MAX_ATTEMPTS'],
+            run_at=now + timedelta(seconds=delay),
+            created_at=now,
+        )
+        .on_conflict_do_nothing(index_elements=['idempotency_key'])
+    )
+    db.session.info['jobs_enqueued'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _wake_after_commit(session):
+    if session.info.pop('jobs_enqueued', False) and has_app_context():
+        current_app.extensions['job_queue'].wake()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_after_rollback(session):
+    session.info.pop('jobs_enqueued', None)
+
+
+def _claim(now):
+    # Reading first keeps idle polls from taking SQLite's write lock
+    due = (
+        db.select(Job.id)
+        .where(Job.status == PENDING, Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+    )
+    if db.session.execute(due).first() is None:
+        db.session.rollback()
+        return None
+    # Writers are serialized, so the subquery and the update see the same queue and
+    # no two workers can claim the same job
+    job = db.session.execute(
+        db.update(Job)
+        .where(Job.id == due.scalar_subquery(), Job.status == PENDING)
+        .values(status=RUNNING, attempts=Job.attempts + 1, locked_at=now)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+    ).first()
+    db.session.commit()
+    return job
+
+
+def _run(job, backoff):
+    start = time.perf_counter()
+    try:
+        fn = HANDLERS.get(job.kind)
+        if fn is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}")
+        fn(json.loads(job.payload))
+        db.session.execute(
+            db.update(Job).where(Job.id == job.id).values(status=DONE, locked_at=None, last_error=None)
+        )
+        db.session.commit()
+        outcome = 'done'
+    except Exception:
+        db.session.rollback()
+        error = traceback.format_exc(limit=5)
+        if job.attempts >= job.max_attempts:
+            values, outcome = {'status': FAILED}, 'failed'
+            logger.error("Job %s (%s) failed after %d attempts\n%s", job.id, job.kind, job.attempts, error)
+        else:
+            # Exponential backoff: backoff, 2 * backoff, 4 * backoff, ...
+            retry_at = datetime.utcnow() + timedelta(seconds=backoff * 2 ** (job.attempts - 1))
+            values, outcome = {'status': PENDING, 'run_at': retry_at}, 'retry'
+            logger.warning("Job %s (%s) attempt %d failed, retrying at %s", job.id, job.kind, job.attempts, retry_at)
+        db.session.execute(
+            db.update(Job).where(Job.id == job.id).values(locked_at=None, last_error=error, **values)
+        )
+        db.session.commit()
+    job_seconds.observe(time.perf_counter() - start, kind=job.kind)
+    jobs_processed.inc(kind=job.kind, outcome=outcome)
+    return outcome
+
+
+def release_stale(older_than):
+    """Put jobs whose worker died mid-run (locked before ``older_than``) back in the queue."""
+    released = db.session.execute(
+        db.update(Job)
+        .where(Job.status == RUNNING, Job.locked_at < older_than)
+        .values(status=PENDING, locked_at=None)
+    ).rowcount
+    db.session.commit()
+    return released
+
+
+def purge_finished(older_than, batch_size=1000):
+    # Bounded batches keep each delete's write lock short
+    purged = 0
+    while True:
+        batch = (
+            db.select(Job.id)
+            .where(Job.status == DONE, Job.run_at < older_than)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        deleted = db.session.execute(
+            db.delete(Job).where(Job.id.in_(batch)).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        purged += deleted
+        if deleted < batch_size:
+            return purged
+
+
+def refresh_depth(now=None):
+    """Update the queue depth and lag gauges; returns the depth by status name."""
+    now = now or datetime.utcnow()
+    counts = dict(
+        db.session.query(Job.status, db.func.count())
+        .filter(Job.status.in_([PENDING, RUNNING, FAILED]))
+        .group_by(Job.status)
+        .all()
+    )
+    oldest = db.session.query(db.func.min(Job.run_at)).filter(Job.status == PENDING, Job.run_at <= now).scalar()
+    db.session.rollback()
+    depth = {status.value: counts.get(status, 0) for status in (PENDING, RUNNING, FAILED)}
+    for status, count in depth.items():
+        queue_depth.set(count, status=status)
+    queue_lag.set((now - oldest).total_seconds() if oldest else 0.0)
+    return depth
+
+
+class _WorkerPool:
+    # Per-app state: the worker threads of this process and their wake-up signal
+
+    def __init__(self, app):
+        self.app = app
+        config = app.config
+        self.workers = config['JOB_WORKERS']
+        self.poll_interval = config['JOB_POLL_INTERVAL']
+        self.backoff = config['JOB_RETRY_BACKOFF']
+        self.lock_timeout = timedelta(seconds=config['JOB_LOCK_TIMEOUT'])
+        self.retention = config['JOB_RETENTION']
+        self.maintenance_interval = config['JOB_MAINTENANCE_INTERVAL']
+        self.lock = threading.Lock()
+        self.wakeup = threading.Condition()
+        self.signalled = 0
+        self.pid = None
+        self.last_maintenance = 0.0
+        self.stop = threading.Event()
+        atexit.register(self.shutdown)
+
+    def ensure_running(self):
+        # Started lazily (and again after a fork) so CLI commands and the gunicorn
+        # master never run workers of their own
+        if self.pid == os.getpid() or self.workers <= 0:
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+        for n in range(self.workers):
+            threading.Thread(target=self.work, name=f'job-worker-{n}', daemon=True).start()
+
+    def wake(self):
+        self.ensure_running()
+        with self.wakeup:
+            self.signalled += 1
+            self.wakeup.notify()
+
+    def run_one(self):
+        """Claim and run the next due job; returns its outcome, or None if nothing is due."""
+        with self.app.app_context():
+            job = _claim(datetime.utcnow())
+            return _run(job, self.backoff) if job is not None else None
+
+    def maintain(self):
+        now = datetime.utcnow()
+        with self.app.app_context():
+            release_stale(now - self.lock_timeout)
+            purge_finished(now - self.retention)
+            refresh_depth(now)
+
+    def work(self):
+        # Loop of one worker thread, or of flask run-jobs --watch
+        while not self.stop.is_set():
+            try:
+                if self.run_one() is not None:
+                    continue
+                with self.lock:
+                    due = time.monotonic() - self.last_maintenance >= self.maintenance_interval
+                    if due:
+                        self.last_maintenance = time.monotonic()
+                if due:
+                    self.maintain()
+            except Exception:
+                # Database unavailable or locked for too long; try again next poll
+                logger.exception("Job worker error")
+            with self.wakeup:
+                if not self.signalled:
+                    self.wakeup.wait(self.poll_interval)
+                self.signalled = max(self.signalled - 1, 0)
+
+    def shutdown(self):
+        self.stop.set()
+        with self.wakeup:
+            self.wakeup.notify_all()
+
+
+class JobQueue:
+    """Durable in-process job queue backed by the ``jobs`` outbox table.
+
+    ``enqueue`` writes jobs in the caller's transaction. ``JOB_WORKERS`` threads per
+    process claim due jobs, run the
+    registered handler and retry failures up to ``JOB_MAX_ATTEMPTS`` times with
+    exponential backoff from ``JOB_RETRY_BACKOFF`` seconds. Idle workers poll every
+    ``JOB_POLL_INTERVAL`` seconds, so jobs enqueued by other processes are picked
+    up too, and every ``JOB_MAINTENANCE_INTERVAL`` seconds one of them requeues
+    jobs locked for over ``JOB_LOCK_TIMEOUT`` seconds, purges jobs finished more
+    than ``JOB_RETENTION`` ago and refreshes the queue depth gauges.
+
+    Worker threads share the GIL and the write lock with the requests of their
+    process; set ``JOB_WORKERS`` to 0 in the web workers and run ``flask run-jobs
+    --watch`` as a separate process to keep jobs off the request path entirely.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('JOB_WORKERS', 1)  # SQLite has one writer; more threads mostly contend
+        app.config.setdefault('JOB_POLL_INTERVAL', 1.0)
+        app.config.setdefault('JOB_MAX_ATTEMPTS', 5)
+        app.config.setdefault('JOB_RETRY_BACKOFF', 2.0)
+        app.config.setdefault('JOB_LOCK_TIMEOUT', 300)
+        app.config.setdefault('JOB_RETENTION', timedelta(days=1))
+        app.config.setdefault('JOB_MAINTENANCE_INTERVAL', 60.0)
+        pool = app.extensions['job_queue'] = _WorkerPool(app)
+        app.before_request(pool.ensure_running)
+
+        @app.cli.command('run-jobs')
+        @click.option('--watch', is_flag=True, help='Keep polling for jobs until interrupted (a dedicated worker)')
+        @click.option('--maintain', is_flag=True, help='Also requeue stale jobs and purge finished ones')
+        def run_jobs_command(watch, maintain):
+            """Run every due job in this process, then exit."""
+            if watch:
+                click.echo(f"Polling for jobs every {pool.poll_interval}s, Ctrl+C to stop")
+                try:
+                    pool.work()
+                except KeyboardInterrupt:
+                    pass
+                return
+            outcomes = self.drain(app)
+            if maintain:
+                pool.maintain()
+            click.echo(f"Ran {sum(outcomes.values())} jobs: {dict(outcomes) or 'none due'}")
+
+    def _pool(self, app=None):
+        return (app or current_app).extensions['job_queue']
+
+    def drain(self, app=None):
+        """Run due jobs in the calling thread until none are left; returns counts by outcome."""
+        pool = self._pool(app)
+        outcomes = {}
+        while True:
+            outcome = pool.run_one()
+            if outcome is None:
+                break
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        with pool.app.app_context():
+            refresh_depth()
+        return outcomes
+
+    def depth(self, app=None):
+        with self._pool(app).app.app_context():
+            return refresh_depth()
+
+
+job_queue = JobQueue()
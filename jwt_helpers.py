@@ -2,7 +2,8 @@
 
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from functools import wraps
-from models import User, RoleEnum  # Adjust the import based on your project structure
+from models import RoleEnum  # Adjust the import based on your project structure
+from role_cache import role_for
 
 def generate_token(user_id, role):
     return create_access_token(identity={"user_id": user_id, "role": role})
@@ -12,8 +13,8 @@ def admin_required(fn):
     @jwt_required()
     def wrapper(*args, **kwargs):
         current_user = get_jwt_identity()
-        user = User.query.get(current_user['user_id'])
-        if user and user.role == RoleEnum.admin:  # Ensure you have an 'is_admin' attribute or similar in your User model
+        # Cached (or trusted from the signed claim), so authorization costs no query on a hit
+        if role_for(current_user) == RoleEnum.admin.name:
             return fn(*args, **kwargs)
         else:
             return {"message": "Admin access required"}, 403
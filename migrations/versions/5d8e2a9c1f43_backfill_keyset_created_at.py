@@ -0,0 +1,26 @@
+"""backfill keyset created_at
+
+Revision ID: 5d8e2a9c1f43
+Revises: b41f0c7d2e95
+Create Date: 2026-10-18 09:21:47.902315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e2a9c1f43'
+down_revision = 'b41f0c7d2e95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keyset pages skip rows with a NULL created_at, so give rows inserted without one a value
+    op.execute("UPDATE products SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+    op.execute("UPDATE orders SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+
+
+def downgrade():
+    pass
@@ -0,0 +1,70 @@
+"""add product full text search
+
+Revision ID: 687672701bf6
+Revises: 7c91094a6abb
+Create Date: 2026-10-18 08:13:54.079621
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '687672701bf6'
+down_revision = '7c91094a6abb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 index over product name, description and category name; rowid is the
+    # product id. Kept in sync by the triggers below, which only fire on the
+    # searchable columns so stock updates never touch the index.
+    op.execute(
+        "CREATE VIRTUAL TABLE products_fts USING fts5("
+        "name, description, category, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN "
+        "INSERT INTO products_fts (rowid, name, description, category) VALUES ("
+        "new.id, new.name, new.description, (SELECT name FROM categories WHERE id = new.category_id)); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER products_fts_update AFTER UPDATE OF name, description, category_id ON products BEGIN "
+        "UPDATE products_fts SET name = new.name, description = new.description, "
+        "category = (SELECT name FROM categories WHERE id = new.category_id) WHERE rowid = old.id; "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN "
+        "DELETE FROM products_fts WHERE rowid = old.id; "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER categories_fts_update AFTER UPDATE OF name ON categories BEGIN "
+        "UPDATE products_fts SET category = new.name "
+        "WHERE rowid IN (SELECT id FROM products WHERE category_id = new.id); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER categories_fts_delete AFTER DELETE ON categories BEGIN "
+        "UPDATE products_fts SET category = NULL "
+        "WHERE rowid IN (SELECT id FROM products WHERE category_id = old.id); "
+        "END"
+    )
+    op.execute(
+        "INSERT INTO products_fts (rowid, name, description, category) "
+        "SELECT products.id, products.name, products.description, categories.name "
+        "FROM products LEFT JOIN categories ON categories.id = products.category_id"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS categories_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS categories_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS products_fts_insert")
+    op.execute("DROP TABLE IF EXISTS products_fts")
@@ -0,0 +1,30 @@
+"""autoincrement revoked token ids
+
+Revision ID: b41f0c7d2e95
+Revises: 3c2b912456c7
+Create Date: 2026-10-18 09:02:11.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41f0c7d2e95'
+down_revision = '3c2b912456c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rebuild the table with AUTOINCREMENT so ids freed by the purge are never handed
+    # out again; the copied rows seed sqlite_sequence with the current maximum
+    with op.batch_alter_table('revoked_tokens', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': True}) as batch_op:
+        pass
+
+
+def downgrade():
+    with op.batch_alter_table('revoked_tokens', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': False}) as batch_op:
+        pass
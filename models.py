@@ -1,10 +1,13 @@
 #models.py
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import joinedload, selectinload, load_only
+from routing import RoutingSession
+from passwords import hash_password, verify_password
 import enum
 
-db = SQLAlchemy()
+# Reads from GET handlers are routed to the read-only pool, see routing.py
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Enum for user roles
 class RoleEnum(enum.Enum):
@@ -17,6 +20,13 @@ class OrderStatusEnum(enum.Enum):
     COMPLETED = "COMPLETED"
     CANCELLED = "CANCELLED"
 
+# Enum for background job state, see jobs.py
+class JobStatusEnum(enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
 class User(db.Model):
     __tablename__ = 'users'
 
@@ -33,10 +43,10 @@ class User(db.Model):
     products = db.relationship('Product', back_populates='user', lazy=True)
 
     def set_password(self, password):
-        self.password_digest = generate_password_hash(password)
+        self.password_digest = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_digest, password)
+        return verify_password(self.password_digest, password)[0]
 
     def to_dict(self):
         return {
@@ -62,11 +72,18 @@ class Product(db.Model):
     image_url = db.Column(db.String(255), nullable=True)  # New column for image URL
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     order_items = db.relationship('OrderItem', backref='product', lazy=True)
     category = db.relationship('Category', backref='products')
     user = db.relationship('User', back_populates='products')
 
+    # Keyset pagination indexes for the catalog listing, see pagination.keyset_page
+    __table_args__ = (
+        db.Index('ix_products_created_at_id', 'created_at', 'id'),
+        db.Index('ix_products_category_id_created_at_id', 'category_id', 'created_at', 'id'),
+        db.Index('ix_products_in_stock_created_at_id', 'created_at', 'id', sqlite_where=db.text('stock > 0')),
+        db.Index('ix_products_price', 'price'),
+    )
 
     def to_dict(self):
         return {
@@ -86,7 +103,7 @@ class Category(db.Model):
     __tablename__ = 'categories'
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)  # Duplicate-name check on create
     description = db.Column(db.Text)
 
     def to_dict(self):
@@ -108,6 +125,28 @@ class Order(db.Model):
 
     order_items = db.relationship('OrderItem', backref='order', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_orders_created_at_id', 'created_at', 'id'),  # Date-range export in key order
+        db.Index('ix_orders_user_id_created_at_id', 'user_id', 'created_at', 'id'),  # A customer's order history
+    )
+
+    @staticmethod
+    def with_items():
+        # Items of every loaded order in one IN query, each joined to the name and
+        # image of its product, so a page of orders costs two queries however long it is
+        return selectinload(Order.order_items).joinedload(OrderItem.product).load_only(
+            Product.id, Product.name, Product.image_url
+        )
+
+    def to_history_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status.value,
+            'total_price': str(self.total_price),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'order_items': [item.to_history_dict() for item in self.order_items]
+        }
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -122,8 +161,8 @@ class OrderItem(db.Model):
     __tablename__ = 'order_items'
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)  # Price at order time
 
@@ -136,15 +175,32 @@ class OrderItem(db.Model):
             'price': str(self.price)
         }
 
+    def to_history_dict(self):
+        # Uses the product loaded by Order.with_items(); None if it was deleted
+        product = self.product
+        return {
+            **self.to_dict(),
+            'product_name': product.name if product else None,
+            'image_url': product.image_url if product else None
+        }
+
 class Cart(db.Model):
     __tablename__ = 'carts'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Sweeper range
 
-    cart_items = db.relationship('CartItem', backref='cart', lazy=True)
+    cart_items = db.relationship('CartItem', backref='cart', lazy=True, order_by='CartItem.id')
+
+    @staticmethod
+    def load_for_user(user_id):
+        # Cart, items and their products in one joined query, so serializing the
+        # cart never goes back to the database per line
+        return Cart.query.options(
+            joinedload(Cart.cart_items).joinedload(CartItem.product)
+        ).filter_by(user_id=user_id).first()
 
     def to_dict(self):
         return {
@@ -159,11 +215,19 @@ class CartItem(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     cart_id = db.Column(db.Integer, db.ForeignKey('carts.id'), nullable=False)
-    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
 
+    product = db.relationship('Product')
+
+    __table_args__ = (
+        # One line per product per cart; the conflict target of the cart upserts in carts.py
+        db.Index('ix_cart_items_cart_id_product_id', 'cart_id', 'product_id', unique=True),
+    )
+
     def to_dict(self):
-        product = Product.query.get(self.product_id)  # Fetch the related product
+        # Uses the related product already loaded by Cart.load_for_user when available
+        product = self.product
         return {
             'id': self.id,
             'cart_id': self.cart_id,
@@ -175,10 +239,11 @@ class Invoice(db.Model):
     __tablename__ = 'invoices'
 
     id = db.Column(db.Integer, primary_key=True)
-    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False, index=True)
     billing_address = db.Column(db.String(255), nullable=False)
     total_amount = db.Column(db.Numeric(10, 2), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    document_hash = db.Column(db.String(64))  # SHA-256 of the rendered document, see invoices.py
     
     order = db.relationship('Order', backref='invoices')
 
@@ -201,25 +266,46 @@ class Analytics(db.Model):
     most_purchased_product_id = db.Column(db.Integer, db.ForeignKey('products.id'))
     
     @staticmethod
-    def update_product_views():
-        analytics = Analytics.query.first()
-        analytics.product_views += 1
-        db.session.commit()
+    def _increment(**deltas):
+        # Increment in SQL so concurrent writers can't lose updates, creating the
+        # row on first use
+        result = db.session.execute(
+            db.update(Analytics)
+            .where(Analytics.id == db.select(db.func.min(Analytics.id)).scalar_subquery())
+            .values({name: getattr(Analytics, name) + delta for name, delta in deltas.items()})
+        )
+        if result.rowcount == 0:
+            db.session.add(Analytics(**{'product_views': 0, 'total_orders': 0, 'revenue': 0, **deltas}))
+
+    @staticmethod
+    def update_product_views(views=1, commit=True):
+        # Request handlers go through counters.view_counter, which batches views
+        # and flushes them here
+        Analytics._increment(product_views=views)
+        if commit:
+            db.session.commit()
     
     @staticmethod
-    def update_total_orders_and_revenue(order_total):
-        analytics = Analytics.query.first()
-        analytics.total_orders += 1
-        analytics.revenue += order_total
-        db.session.commit()
+    def update_total_orders_and_revenue(order_total, commit=True):
+        # Callers that are already inside a transaction (checkout) pass commit=False
+        Analytics._increment(total_orders=1, revenue=order_total)
+        if commit:
+            db.session.commit()
     
     @staticmethod
-    def update_most_purchased_product(product_id):
-        # Logic to update most purchased product based on frequency
-        # e.g., updating most_purchased_product_id
-        analytics = Analytics.query.first()
-        analytics.most_purchased_product_id = product_id
-        db.session.commit()
+    def update_most_purchased_product(commit=True):
+        # Read the leader off the lifetime rollup (indexed on units_sold) rather
+        # than aggregating order_items
+        leader = (
+            db.select(ProductStats.product_id)
+            .where(ProductStats.units_sold > 0)
+            .order_by(ProductStats.units_sold.desc(), ProductStats.product_id)
+            .limit(1)
+            .scalar_subquery()
+        )
+        db.session.execute(db.update(Analytics).values(most_purchased_product_id=leader))
+        if commit:
+            db.session.commit()
 
     def to_dict(self):
         return {
@@ -229,3 +315,121 @@ class Analytics(db.Model):
             'revenue': str(self.revenue),
             'most_purchased_product_id': self.most_purchased_product_id
         }
+
+
+class ProductStats(db.Model):
+    __tablename__ = 'product_stats'
+
+    # Lifetime rollup per product, maintained incrementally by rollups.py
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_product_stats_units_sold', 'units_sold'),
+        db.Index('ix_product_stats_views', 'views'),
+    )
+
+    def to_dict(self):
+        return {
+            'product_id': self.product_id,
+            'views': self.views,
+            'units_sold': self.units_sold,
+            'revenue': str(self.revenue)
+        }
+
+
+class DailyProductStats(db.Model):
+    __tablename__ = 'daily_product_stats'
+
+    # Per-day rollup per product; the (day, product_id) key keeps windowed
+    # queries to a range scan over the days requested
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), primary_key=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(),
+            'product_id': self.product_id,
+            'views': self.views,
+            'units_sold': self.units_sold,
+            'revenue': str(self.revenue)
+        }
+
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    # Blocklisted JWTs, kept only until the token would have expired anyway
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Workers sync on "id > last id seen", so ids must never be reused once purged
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'jti': self.jti,
+            'expires_at': self.expires_at.isoformat(),
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class CatalogVersion(db.Model):
+    __tablename__ = 'catalog_versions'
+
+    # One row per catalog table ('products', 'categories'), bumped by triggers on
+    # every insert, update or delete so readers can validate caches with a PK lookup
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'version': self.version,
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+
+    # Outbox of follow-up work, written in the transaction that produced it and
+    # drained by the worker pool in jobs.py
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    idempotency_key = db.Column(db.String(128), unique=True)
+    status = db.Column(db.Enum(JobStatusEnum), nullable=False, default=JobStatusEnum.PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not before; last run once finished
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Claiming the next due job, queue depth per status and purging finished jobs
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'idempotency_key': self.idempotency_key,
+            'status': self.status.value,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat(),
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,94 @@
+#pagination.py
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def clamp_limit(limit, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def encode_cursor(*values):
+    # Datetimes are the only non-JSON values we page on, so tag them explicitly
+    payload = [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_value(value):
+    # Only what encode_cursor emits; anything else (lists, objects, null, booleans)
+    # would otherwise reach the database as a bind parameter
+    if isinstance(value, dict) and value.keys() == {'dt'}:
+        return datetime.fromisoformat(value['dt'])
+    if type(value) in (str, int, float):
+        return value
+    raise ValueError(value)
+
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list):
+            raise InvalidCursor(token)
+        return [_decode_value(v) for v in payload]
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(token) from e
+
+
+def decode_keyset_cursor(token, columns):
+    """Decode a cursor for ``columns``, checking it has one value of each column's type.
+
+    SQLite compares values of different types without complaint (text sorts after
+    every number and date), so a mistyped cursor would return a wrong page
+    rather than fail; raise ``InvalidCursor`` instead.
+    """
+    values = decode_cursor(token)
+    if len(values) != len(columns):
+        raise InvalidCursor(token)
+    for value, column in zip(values, columns):
+        try:
+            expected = column.type.python_type
+        except NotImplementedError:
+            continue
+        if not isinstance(value, expected):
+            raise InvalidCursor(token)
+    return values
+
+
+def keyset_page(query, columns, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=True):
+    """Return one page of ``query`` ordered by ``columns`` plus the cursor for the next page.
+
+    ``columns`` must be unique as a tuple (e.g. ``(created_at, id)``) and backed by an
+    index so each page is a bounded index range scan instead of an OFFSET walk.
+    Rows with a NULL in a nullable key column are left out: they cannot be
+    compared against a cursor, so they would end the walk early.
+    """
+    query = query.filter(*[c.isnot(None) for c in columns if c.nullable])
+    if cursor:
+        values = decode_keyset_cursor(cursor, columns)
+        key = tuple_(*columns)
+        query = query.filter(key < tuple_(*values) if descending else key > tuple_(*values))
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+    # Fetch one extra row to know whether another page exists without a COUNT(*)
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(*[getattr(last, c.key) for c in columns])
+    return rows, next_cursor
@@ -0,0 +1,107 @@
+#passwords.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def normalize_method(method):
+    """Expand a werkzeug method string to the exact form stored in digests."""
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f"Unsupported password hash method {method!r}")
+
+
+def _cost(method):
+    # Comparable work factor within one algorithm
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args)
+        return (name, n * r * p)
+    return (name, args[0], int(args[1]))
+
+
+class HashingPolicy:
+    """Password hashing policy with a bounded pool of hashing threads.
+
+    ``hashlib`` releases the GIL while hashing, so the pool gives real parallelism
+    up to ``workers`` while capping how many request threads can be tied up in
+    key derivation. Callers wait at most ``timeout`` seconds for a slot and get
+    ``HashingBusy`` instead of queueing forever.
+    """
+
+    def __init__(self, method='scrypt', salt_length=16, workers=None, queue_size=None, timeout=10.0):
+        self.method = normalize_method(method)
+        self.salt_length = salt_length
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.workers + (queue_size if queue_size is not None else self.workers * 4))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise HashingBusy("Password hashing pool is saturated")
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, digest, password):
+        return self._run(check_password_hash, digest, password)
+
+    def needs_rehash(self, digest):
+        # A different algorithm, or the same one with a lower work factor
+        stored = digest.split('$', 1)[0]
+        try:
+            stored_cost, policy_cost = _cost(normalize_method(stored)), _cost(self.method)
+        except (ValueError, IndexError):
+            return True
+        if stored_cost[:-1] != policy_cost[:-1]:
+            return True
+        return stored_cost[-1] < policy_cost[-1]
+
+
+def init_app(app):
+    app.config.setdefault('PASSWORD_HASH_METHOD', 'scrypt')
+    app.config.setdefault('PASSWORD_HASH_SALT_LENGTH', 16)
+    app.config.setdefault('PASSWORD_HASH_WORKERS', None)  # Defaults to the CPU count
+    app.config.setdefault('PASSWORD_HASH_QUEUE_SIZE', None)
+    app.config.setdefault('PASSWORD_HASH_TIMEOUT', 10.0)
+    app.extensions['password_policy'] = HashingPolicy(
+        app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_HASH_SALT_LENGTH'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_size=app.config['PASSWORD_HASH_QUEUE_SIZE'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT'],
+    )
+
+
+def get_policy(app=None):
+    return (app or current_app).extensions['password_policy']
+
+
+def hash_password(password):
+    return get_policy().hash(password)
+
+
+def verify_password(digest, password):
+    """Return ``(matches, needs_rehash)`` for a stored digest under the current policy."""
+    policy = get_policy()
+    if not policy.verify(digest, password):
+        return False, False
+    return True, policy.needs_rehash(digest)
@@ -0,0 +1,129 @@
+#role_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from models import db, User
+from routing import RoutingSession
+from metrics import registry
+
+_MISSING = object()
+
+role_cache_requests = registry.counter(
+    'admin_role_cache_requests_total', 'Admin role lookups by cache result', ['result']
+)
+
+
+class RoleCache:
+    """Bounded LRU of user id -> role name with a TTL.
+
+    Deleted users are cached as ``None``. Entries are dropped when a committed
+    session changed a user's role or deleted the user; the TTL bounds staleness
+    for changes made by other worker processes or bulk updates.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                role_cache_requests.inc(result='hit')
+                return entry[0]
+            if entry is not None:
+                del self._entries[user_id]
+            self.misses += 1
+            role_cache_requests.inc(result='miss')
+            return _MISSING
+
+    def set(self, user_id, role):
+        with self._lock:
+            self._entries[user_id] = (role, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0
+            }
+
+
+def init_app(app):
+    app.config.setdefault('ADMIN_ROLE_CACHE_SIZE', 1024)
+    app.config.setdefault('ADMIN_ROLE_CACHE_TTL', 60.0)
+    # Tokens are signed, so the role claim can be trusted outright; the trade-off
+    # is that a demoted admin keeps access until their token expires
+    app.config.setdefault('JWT_TRUST_ROLE_CLAIM', False)
+    app.extensions['role_cache'] = RoleCache(app.config['ADMIN_ROLE_CACHE_SIZE'], app.config['ADMIN_ROLE_CACHE_TTL'])
+
+
+def get_role_cache(app=None):
+    return (app or current_app).extensions['role_cache']
+
+
+def role_for(identity):
+    """Role name for a JWT identity, without a database round-trip on a cache hit."""
+    if current_app.config['JWT_TRUST_ROLE_CLAIM']:
+        return identity.get('role')
+
+    cache = get_role_cache()
+    user_id = identity['user_id']
+    role = cache.get(user_id)
+    if role is _MISSING:
+        user = db.session.get(User, user_id)
+        role = user.role.name if user else None
+        cache.set(user_id, role)
+    return role
+
+
+# Collect role changes and deletions at flush time, drop them once the commit lands
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    if inspect(target).attrs.role.history.has_changes():
+        inspect(target).session.info.setdefault('role_cache_stale', set()).add(target.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    inspect(target).session.info.setdefault('role_cache_stale', set()).add(target.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_committed(session):
+    stale = session.info.pop('role_cache_stale', None)
+    if stale and has_app_context() and 'role_cache' in current_app.extensions:
+        cache = get_role_cache()
+        for user_id in stale:
+            cache.invalidate(user_id)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop('role_cache_stale', None)
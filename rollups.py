@@ -0,0 +1,109 @@
+#rollups.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy.dialects.sqlite import insert
+from models import db, Product, ProductStats, DailyProductStats
+
+MAX_WINDOW_DAYS = 90
+MAX_TOP_N = 50
+
+
+def _upsert(model, keys, rows, counters):
+    # One executemany INSERT ... ON CONFLICT DO UPDATE adding the deltas in place
+    stmt = insert(model)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: getattr(model, name) + getattr(stmt.excluded, name) for name in counters}
+    )
+    db.session.execute(stmt, rows)
+
+
+def _apply(deltas, day, counters):
+    if not deltas:
+        return
+    rows = [{'product_id': product_id, 'views': 0, 'units_sold': 0, 'revenue': 0, **values}
+            for product_id, values in sorted(deltas.items())]
+    _upsert(ProductStats, ['product_id'], rows, counters)
+    _upsert(DailyProductStats, ['day', 'product_id'], [{'day': day, **row} for row in rows], counters)
+
+
+def record_sales(lines, day=None):
+    """Add ``(product_id, quantity, unit_price)`` lines to the lifetime and daily rollups.
+
+    Runs in the caller's transaction so checkout and its rollups commit together.
+    """
+    deltas = defaultdict(lambda: {'units_sold': 0, 'revenue': Decimal('0')})
+    for product_id, quantity, price in lines:
+        deltas[product_id]['units_sold'] += quantity
+        deltas[product_id]['revenue'] += Decimal(price) * quantity
+    _apply(deltas, day or datetime.utcnow().date(), ('units_sold', 'revenue'))
+
+
+def record_views(views_by_product, day=None):
+    """Add a ``{product_id: views}`` batch (from the view counter) to the rollups."""
+    deltas = {product_id: {'views': views} for product_id, views in views_by_product.items() if views}
+    _apply(deltas, day or datetime.utcnow().date(), ('views',))
+
+
+def _window_start(days):
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+def top_products(metric, days=7, limit=10):
+    """Top ``limit`` products by ``metric`` over the last ``days`` days, read from the daily rollup."""
+    column = getattr(DailyProductStats, metric)
+    total = db.func.sum(column).label('total')
+    rows = (
+        db.session.query(DailyProductStats.product_id, total, db.func.sum(DailyProductStats.revenue))
+        .filter(DailyProductStats.day >= _window_start(days))
+        .group_by(DailyProductStats.product_id)
+        .having(total > 0)
+        .order_by(total.desc(), DailyProductStats.product_id)
+        .limit(limit)
+        .all()
+    )
+    names = dict(
+        db.session.query(Product.id, Product.name).filter(Product.id.in_([r[0] for r in rows])).all()
+    )
+    return [
+        {'product_id': product_id, 'name': names.get(product_id), metric: int(value), 'revenue': str(revenue)}
+        for product_id, value, revenue in rows
+    ]
+
+
+def daily_totals(days=7):
+    """Shop-wide views, units and revenue per day over the last ``days`` days."""
+    rows = (
+        db.session.query(
+            DailyProductStats.day,
+            db.func.sum(DailyProductStats.views),
+            db.func.sum(DailyProductStats.units_sold),
+            db.func.sum(DailyProductStats.revenue),
+        )
+        .filter(DailyProductStats.day >= _window_start(days))
+        .group_by(DailyProductStats.day)
+        .order_by(DailyProductStats.day)
+        .all()
+    )
+    return [
+        {'day': day.isoformat(), 'views': views, 'units_sold': units_sold, 'revenue': str(revenue)}
+        for day, views, units_sold, revenue in rows
+    ]
+
+
+def product_history(product_id, days=30):
+    """Lifetime totals plus the daily series for one product."""
+    lifetime = db.session.get(ProductStats, product_id)
+    series = (
+        DailyProductStats.query
+        .filter(DailyProductStats.day >= _window_start(days), DailyProductStats.product_id == product_id)
+        .order_by(DailyProductStats.day)
+        .all()
+    )
+    return {
+        **(lifetime.to_dict() if lifetime else
+           {'product_id': product_id, 'views': 0, 'units_sold': 0, 'revenue': '0'}),
+        'daily': [row.to_dict() for row in series],
+    }
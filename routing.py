@@ -0,0 +1,88 @@
+#routing.py
+
+import time
+from flask import has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Select
+from metrics import registry
+
+READER_BIND = 'reader'
+READ_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+pool_checkout_seconds = registry.histogram(
+    'db_pool_checkout_seconds', 'Time spent waiting for a pooled database connection', ['pool']
+)
+
+
+class TimedQueuePool(QueuePool):
+    # Records how long each checkout waited, labelled with the pool's role
+    label = 'writer'
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_seconds.observe(time.perf_counter() - start, pool=self.label)
+
+
+class ReaderQueuePool(TimedQueuePool):
+    label = READER_BIND
+
+
+class RoutingSession(Session):
+    """Send plain SELECTs issued while serving a read request to the read-only pool.
+
+    Everything else (flushes, bulk UPDATE/INSERT/DELETE, text statements, CLI and
+    background work) goes to the writer, so GET handlers that happen to write still
+    work and mutations never touch a read-only connection.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and has_request_context()
+            and request.method in READ_METHODS
+        ):
+            reader = self._db.engines.get(READER_BIND)
+            if reader is not None:
+                return reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def configure_read_write_split(app):
+    """Add a read-only reader bind next to the writer before ``db.init_app``.
+
+    Only file-backed SQLite databases are split; ``DB_READ_ROUTING`` turns it off.
+    ``DB_READ_POOL_SIZE`` and ``DB_WRITE_POOL_SIZE`` size the two pools.
+    """
+    app.config.setdefault('DB_READ_ROUTING', True)
+    app.config.setdefault('DB_READ_POOL_SIZE', 8)
+    app.config.setdefault('DB_WRITE_POOL_SIZE', 2)
+    app.config.setdefault('DB_POOL_TIMEOUT', 30)
+
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:') or url.query.get('uri'):
+        return
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update({
+        'poolclass': TimedQueuePool,
+        'pool_size': app.config['DB_WRITE_POOL_SIZE'],
+        'max_overflow': 0,
+        'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+    })
+    if not app.config['DB_READ_ROUTING']:
+        return
+
+    reader_url = url.set(database=f'file:{url.database}', query={**url.query, 'mode': 'ro', 'uri': 'true'})
+    app.config.setdefault('SQLALCHEMY_BINDS', {})[READER_BIND] = {
+        'url': reader_url,
+        'poolclass': ReaderQueuePool,
+        'pool_size': app.config['DB_READ_POOL_SIZE'],
+        'max_overflow': 0,
+        'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+    }
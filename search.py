@@ -0,0 +1,61 @@
+#search.py
+
+import re
+from models import db, Product
+
+# products_fts is an FTS5 table created by migration 687672701bf6 and kept in
+# sync by triggers; rowid is the product id
+FTS_TABLE = 'products_fts'
+products_fts = db.table(FTS_TABLE, db.column('rowid'))
+
+# bm25 column weights for (name, description, category)
+BM25_WEIGHTS = (10.0, 1.0, 3.0)
+
+# Deep pages re-rank every match, so paging stops here; refine the query instead
+MAX_OFFSET = 1000
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Keep autogenerate from proposing to drop the FTS table and its shadow tables
+    return not (type_ == 'table' and name.startswith(FTS_TABLE))
+
+
+def build_match_query(text, prefix=True):
+    """Turn free text into a safe FTS5 query: every word must match, the last one as a prefix.
+
+    Words are quoted so FTS5 operators and column filters in user input are
+    treated as plain text.
+    """
+    tokens = _TOKEN.findall(text or '')
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if prefix:
+        terms[-1] += '*'  # Type-ahead on the word being typed
+    return ' '.join(terms)
+
+
+def search_products(text, limit, offset=0, prefix=True):
+    """Return ``(products, has_more)`` for a bm25-ranked page of matches."""
+    match = build_match_query(text, prefix)
+    if match is None:
+        return [], False
+
+    # Rank inside the FTS table first so only the page's rows are joined back to products
+    fts = db.literal_column(FTS_TABLE)
+    score = db.func.bm25(fts, *BM25_WEIGHTS)
+    ids = [
+        rowid for (rowid,) in db.session.execute(
+            db.select(products_fts.c.rowid)
+            .where(fts.op('MATCH')(match))
+            .order_by(score, products_fts.c.rowid)
+            .offset(offset)
+            .limit(limit + 1)
+        )
+    ]
+    has_more = len(ids) > limit
+    ids = ids[:limit]
+    products = {product.id: product for product in Product.query.filter(Product.id.in_(ids)).all()}
+    return [products[i] for i in ids if i in products], has_more
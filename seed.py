@@ -1,5 +1,7 @@
 from app import create_app, db
-from models import User, Product, Category, Order, OrderItem, Cart, CartItem, Invoice, Analytics, RoleEnum, OrderStatusEnum
+from models import User, Product, Category, Order, OrderItem, Cart, CartItem, Invoice, Analytics, RoleEnum, OrderStatusEnum, \
+    ProductStats, DailyProductStats
+from rollups import record_sales
 from datetime import datetime
 
 # Initialize Flask app context
@@ -8,7 +10,9 @@ app = create_app()
 # Manually push the app context
 with app.app_context():
     
-    # Clear previous data to avoid conflicts
+    # Clear previous data to avoid conflicts; the rollups first, since product ids are reused
+    db.session.query(DailyProductStats).delete()
+    db.session.query(ProductStats).delete()
     db.session.query(User).delete()
     db.session.query(Product).delete()
     db.session.query(Category).delete()
@@ -144,6 +148,7 @@ with app.app_context():
     db.session.add(order_item1)
     db.session.add(order_item2)
     db.session.add(order_item3)
+    record_sales([(item.product_id, item.quantity, item.price) for item in (order_item1, order_item2, order_item3)])
     db.session.commit()
 
     # Create Carts
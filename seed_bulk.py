@@ -0,0 +1,331 @@
+#seed_bulk.py
+
+import bisect
+import itertools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+import click
+from werkzeug.security import generate_password_hash
+from models import db, User, Category, Product, Cart, CartItem, Order, OrderItem, Invoice, Analytics, \
+    ProductStats, DailyProductStats, Job, RoleEnum, OrderStatusEnum
+from passwords import get_policy
+
+# seed.py's catalog, scaled up by generating variants of each line
+CATEGORIES = [
+    ('Skincare', 'Skin health and beauty products', ['Moisturizer', 'Serum', 'Cleanser', 'Toner', 'Sunscreen']),
+    ('Haircare', 'Products for hair care and styling', ['Shampoo', 'Conditioner', 'Hair Oil', 'Styling Gel']),
+    ('Makeup', 'Cosmetics and beauty products', ['Lipstick', 'Mascara', 'Foundation', 'Eyeliner', 'Blush']),
+]
+VARIANTS = ['Hydrating', 'Long-lasting', 'Gentle', 'Matte', 'Volumizing', 'Radiant', 'Daily', 'Intense']
+STATUSES = [OrderStatusEnum.COMPLETED] * 8 + [OrderStatusEnum.PENDING, OrderStatusEnum.CANCELLED]
+
+# Tables whose secondary indexes are dropped during the load and rebuilt once at the end
+DEFERRED_INDEX_TABLES = ('users', 'carts', 'cart_items', 'products', 'orders', 'order_items', 'invoices')
+
+# Children first, so deletes never trip a foreign key; queued jobs refer to
+# order ids the new dataset reuses
+RESET_ORDER = (
+    Job, DailyProductStats, ProductStats, Invoice, OrderItem, Order, CartItem, Cart, Analytics, Product, Category, User,
+)
+
+CUSTOMER_PASSWORD = 'customerpassword'
+ADMIN_PASSWORD = 'adminpassword'
+
+
+class _Report:
+    # Rows and seconds per stage, printed as rows/sec
+
+    def __init__(self, echo):
+        self.echo = echo
+        self.stages = []
+
+    def stage(self, name, rows, seconds, inserted=True):
+        # Bookkeeping stages (hashing, indexes, rollups) count towards time but not rows
+        self.stages.append((name, rows if inserted else 0, seconds))
+        if inserted:
+            self.echo(f"{name:<14} {rows:>10,} rows {seconds:>8.2f}s {rows / seconds if seconds else 0:>12,.0f} rows/s")
+        else:
+            self.echo(f"{name:<14} {rows:>10,} {'':<4} {seconds:>8.2f}s")
+
+    def total(self):
+        rows = sum(r for _, r, _ in self.stages)
+        seconds = sum(s for _, _, s in self.stages)
+        self.echo(f"{'total':<14} {rows:>10,} rows {seconds:>8.2f}s {rows / seconds if seconds else 0:>12,.0f} rows/s")
+
+
+def _hash_one(args):
+    # Runs in a worker process, so hashing scales across cores
+    password, method, salt_length = args
+    return generate_password_hash(password, method, salt_length)
+
+
+def hash_passwords(passwords, processes=None):
+    """Hash many passwords in parallel worker processes under the current policy."""
+    policy = get_policy()
+    work = [(password, policy.method, policy.salt_length) for password in passwords]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        return list(pool.map(_hash_one, work, chunksize=max(1, len(work) // ((processes or 4) * 8))))
+
+
+def _chunks(rows, size):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _insert(report, name, connection, table, rows, chunk_size):
+    # Core executemany in chunks, all inside the caller's transaction
+    start = time.perf_counter()
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        connection.execute(db.insert(table), chunk)
+        count += len(chunk)
+    report.stage(name, count, time.perf_counter() - start)
+
+
+def _drop_secondary_indexes(connection):
+    rows = connection.execute(db.text(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({})".format(
+            ', '.join(f"'{table}'" for table in DEFERRED_INDEX_TABLES)
+        )
+    )).all()
+    for name, _ in rows:
+        connection.execute(db.text(f'DROP INDEX "{name}"'))
+    return [sql for _, sql in rows]
+
+
+class _Popularity:
+    # Zipf-like weights: item k is chosen with probability proportional to 1 / k**skew
+
+    def __init__(self, items, skew, rng):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cumulative = list(itertools.accumulate(1.0 / (k ** skew) for k in range(1, len(self.items) + 1)))
+        self.rng = rng
+
+    def pick(self):
+        return self.items[bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])]
+
+    def sample(self, count):
+        picked = set()
+        while len(picked) < count:
+            picked.add(self.pick())
+        return picked
+
+
+def _restore_indexes(connection, deferred):
+    for sql in deferred:
+        connection.execute(db.text(sql.replace('CREATE INDEX', 'CREATE INDEX IF NOT EXISTS', 1)
+                                      .replace('CREATE UNIQUE INDEX', 'CREATE UNIQUE INDEX IF NOT EXISTS', 1)))
+    connection.execute(db.text('ANALYZE'))
+    connection.commit()
+
+
+def _email_taken(connection, email):
+    return connection.execute(db.select(db.exists().where(User.email == email))).scalar()
+
+
+def _next_id(connection, column):
+    return (connection.execute(db.select(db.func.max(column))).scalar() or 0) + 1
+
+
+def seed(users=1000, products=5000, orders=20000, days=90, items_per_order=(1, 4), cart_items=(0, 3),
+         skew=1.0, random_seed=42, reset=False, unique_passwords=False, processes=None,
+         chunk_size=10000, echo=print):
+    """Generate a dataset shaped like seed.py's at the given volumes.
+
+    Rows are written with Core executemany inserts in one transaction on one
+    connection running with ``synchronous = OFF``, with the secondary indexes of
+    the bulk tables dropped for the load and rebuilt (and ANALYZEd) once at the
+    end. Product and customer popularity follow a Zipf-like distribution
+    (``skew``; 0 is uniform); order times are uniform over the last ``days`` days. Customers share one precomputed password digest unless
+    ``unique_passwords`` asks for a per-user hash, which is spread over worker
+    processes. Returns ``(admin_id, customer_ids)``.
+    """
+    rng = random.Random(random_seed)
+    report = _Report(echo)
+    now = datetime.utcnow()
+
+    if reset:
+        start = time.perf_counter()
+        for model in RESET_ORDER:
+            db.session.execute(db.delete(model))
+        db.session.commit()
+        report.stage('reset', 0, time.perf_counter() - start, inserted=False)
+
+    start = time.perf_counter()
+    admin_digest, customer_digest = hash_passwords([ADMIN_PASSWORD, CUSTOMER_PASSWORD], processes)
+    customer_digests = (
+        hash_passwords([CUSTOMER_PASSWORD] * users, processes) if unique_passwords else [customer_digest] * users
+    )
+    report.stage('passwords', users if unique_passwords else 2, time.perf_counter() - start, inserted=False)
+
+    # One connection for the whole load, so the bulk settings apply to every statement
+    # and are restored on the connection they were made on before it goes back to the pool
+    with db.engine.connect() as connection:
+        synchronous = connection.execute(db.text('PRAGMA synchronous')).scalar()
+        connection.execute(db.text('PRAGMA synchronous = OFF'))
+        deferred = _drop_secondary_indexes(connection)
+        try:
+            first_user_id = _next_id(connection, User.id)
+            admin_id = first_user_id
+            customer_ids = list(range(first_user_id + 1, first_user_id + 1 + users))
+            # seed.py's logins when they are free, so the usual credentials work on a fresh database
+            seed_logins = not (_email_taken(connection, 'admin_unique@example.com') or
+                               _email_taken(connection, 'customer_unique@example.com'))
+
+            def user_rows():
+                yield {'id': admin_id, 'first_name': 'John', 'last_name': 'Doe',
+                       'email': 'admin_unique@example.com' if seed_logins else f'admin{admin_id}@example.com',
+                       'password_digest': admin_digest, 'role': RoleEnum.admin, 'created_at': now, 'updated_at': now}
+                for i, (uid, digest) in enumerate(zip(customer_ids, customer_digests)):
+                    yield {'id': uid, 'first_name': f'Customer{uid}', 'last_name': 'Smith',
+                           'email': 'customer_unique@example.com' if seed_logins and i == 0 else f'customer{uid}@example.com',
+                           'password_digest': digest, 'role': RoleEnum.customer, 'created_at': now, 'updated_at': now}
+            _insert(report, 'users', connection, User, user_rows(), chunk_size)
+
+            first_cart_id = _next_id(connection, Cart.id)
+            _insert(report, 'carts', connection, Cart, (
+                {'id': first_cart_id + i, 'user_id': uid, 'created_at': now, 'updated_at': now}
+                for i, uid in enumerate(customer_ids)
+            ), chunk_size)
+
+            category_ids = []
+            for name, description, _ in CATEGORIES:
+                category_id = connection.execute(db.select(Category.id).where(Category.name == name)).scalar()
+                if category_id is None:
+                    category_id = connection.execute(
+                        db.insert(Category).values(name=name, description=description).returning(Category.id)
+                    ).scalar()
+                category_ids.append(category_id)
+
+            first_product_id = _next_id(connection, Product.id)
+            product_ids = list(range(first_product_id, first_product_id + products))
+            prices = {pid: round(rng.uniform(4, 60), 2) for pid in product_ids}
+
+            def product_rows():
+                for i, pid in enumerate(product_ids):
+                    c = i % len(CATEGORIES)
+                    base = rng.choice(CATEGORIES[c][2])
+                    yield {
+                        'id': pid, 'name': f'{rng.choice(VARIANTS)} {base} {pid}',
+                        'description': f'{VARIANTS[i % len(VARIANTS)]} {base.lower()} for everyday use',
+                        'price': prices[pid], 'stock': rng.randint(5000, 50000), 'category_id': category_ids[c],
+                        'user_id': admin_id, 'image_url': f'https://example.com/images/{base.lower().replace(" ", "-")}-{pid}.jpg',
+                        'created_at': now - timedelta(days=days, seconds=-i), 'updated_at': now,
+                    }
+            _insert(report, 'products', connection, Product, product_rows(), chunk_size)
+
+            popular_products = _Popularity(product_ids, skew, rng)
+            _insert(report, 'cart_items', connection, CartItem, (
+                {'cart_id': first_cart_id + i, 'product_id': pid, 'quantity': rng.randint(1, 3)}
+                for i in range(users)
+                for pid in popular_products.sample(min(rng.randint(*cart_items), products))
+            ), chunk_size)
+
+            # Orders, their lines and invoices are generated chunk by chunk so ids line up
+            # without RETURNING and memory stays flat however many orders are requested
+            start = time.perf_counter()
+            rows = 0
+            first_order_id = _next_id(connection, Order.id)
+            frequent_customers = _Popularity(customer_ids, skew, rng)
+            for chunk_start in range(first_order_id, first_order_id + orders, chunk_size):
+                order_rows, item_rows, invoice_rows = [], [], []
+                for order_id in range(chunk_start, min(chunk_start + chunk_size, first_order_id + orders)):
+                    created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+                    lines = [(pid, rng.randint(1, 3))
+                             for pid in popular_products.sample(min(rng.randint(*items_per_order), products))]
+                    total = round(sum(prices[pid] * quantity for pid, quantity in lines), 2)
+                    order_rows.append({'id': order_id, 'user_id': frequent_customers.pick(), 'total_price': total,
+                                       'status': rng.choice(STATUSES), 'created_at': created_at, 'updated_at': created_at})
+                    item_rows.extend({'order_id': order_id, 'product_id': pid, 'quantity': quantity, 'price': prices[pid]}
+                                     for pid, quantity in lines)
+                    invoice_rows.append({'order_id': order_id, 'billing_address': f'{order_id} Main St, Cityville, Country',
+                                         'total_amount': total, 'created_at': created_at})
+                for model, batch in ((Order, order_rows), (OrderItem, item_rows), (Invoice, invoice_rows)):
+                    connection.execute(db.insert(model), batch)
+                    rows += len(batch)
+            report.stage('order history', rows, time.perf_counter() - start)
+
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+        finally:
+            # DDL outside a transaction is autocommitted, so the indexes come back even after a failure
+            start = time.perf_counter()
+            _restore_indexes(connection, deferred)
+            connection.execute(db.text(f'PRAGMA synchronous = {synchronous}'))
+            report.stage('indexes', len(deferred), time.perf_counter() - start, inserted=False)
+
+    start = time.perf_counter()
+    _rebuild_rollups()
+    db.session.commit()
+    report.stage('rollups', orders, time.perf_counter() - start, inserted=False)
+
+    report.total()
+    return admin_id, customer_ids
+
+
+def _rebuild_rollups():
+    # Recompute the order-derived columns (units sold, revenue, order totals) from the full
+    # order history. Views only come from live traffic, so recorded ones are kept, which
+    # lets bulk data be added to a database that is in use; --reset has already cleared them
+    db.session.execute(db.text('UPDATE product_stats SET units_sold = 0, revenue = 0'))
+    db.session.execute(db.text('UPDATE daily_product_stats SET units_sold = 0, revenue = 0'))
+    # "WHERE true" keeps SQLite from reading ON CONFLICT as a join constraint of the SELECT
+    db.session.execute(db.text(
+        "INSERT INTO product_stats (product_id, views, units_sold, revenue) "
+        "SELECT product_id, 0, SUM(quantity), SUM(quantity * price) FROM order_items WHERE true GROUP BY product_id "
+        "ON CONFLICT (product_id) DO UPDATE SET units_sold = excluded.units_sold, revenue = excluded.revenue"
+    ))
+    db.session.execute(db.text(
+        "INSERT INTO daily_product_stats (day, product_id, views, units_sold, revenue) "
+        "SELECT date(orders.created_at), order_items.product_id, 0, SUM(order_items.quantity), "
+        "SUM(order_items.quantity * order_items.price) "
+        "FROM order_items JOIN orders ON orders.id = order_items.order_id "
+        "WHERE orders.created_at IS NOT NULL "
+        "GROUP BY date(orders.created_at), order_items.product_id "
+        "ON CONFLICT (day, product_id) DO UPDATE SET units_sold = excluded.units_sold, revenue = excluded.revenue"
+    ))
+    views = db.session.query(db.func.coalesce(db.func.sum(Analytics.product_views), 0)).scalar()
+    total_orders, revenue = db.session.query(db.func.count(Order.id), db.func.sum(Order.total_price)).one()
+    db.session.execute(db.delete(Analytics))
+    db.session.add(Analytics(product_views=views, total_orders=total_orders, revenue=revenue or 0))
+    db.session.flush()
+    Analytics.update_most_purchased_product(commit=False)
+
+
+def _range(text):
+    low, _, high = text.partition('-')
+    low, high = int(low), int(high or low)
+    if low < 0 or high < low:
+        raise click.BadParameter(f"{text!r} is not a range like 1-4")
+    return low, high
+
+
+def init_app(app):
+    @app.cli.command('seed-bulk')
+    @click.option('--users', default=1000, show_default=True, help='Customers (each with a cart)')
+    @click.option('--products', default=5000, show_default=True)
+    @click.option('--orders', default=20000, show_default=True)
+    @click.option('--days', default=90, show_default=True, help='Order history spread over this many days')
+    @click.option('--items-per-order', default='1-4', show_default=True, help='Range of lines per order')
+    @click.option('--cart-items', default='0-3', show_default=True, help='Range of items per cart')
+    @click.option('--skew', default=1.0, show_default=True, help='Zipf skew of product/customer popularity, 0 = uniform')
+    @click.option('--seed', 'random_seed', default=42, show_default=True, help='Random seed')
+    @click.option('--reset', is_flag=True, help='Delete existing users, catalog, carts and orders first')
+    @click.option('--unique-passwords', is_flag=True, help='Hash the customer password separately for each user (distinct salts)')
+    @click.option('--processes', type=int, default=None, help='Password hashing processes (default: CPU count)')
+    @click.option('--chunk-size', default=10000, show_default=True, help='Rows per executemany batch')
+    def seed_bulk_command(users, products, orders, days, items_per_order, cart_items, skew, random_seed, reset,
+                          unique_passwords, processes, chunk_size):
+        """Generate a large perf-test dataset with bulk inserts and deferred indexes."""
+        seed(users=users, products=products, orders=orders, days=days, items_per_order=_range(items_per_order),
+             cart_items=_range(cart_items), skew=skew, random_seed=random_seed, reset=reset,
+             unique_passwords=unique_passwords, processes=processes, chunk_size=chunk_size, echo=click.echo)
@@ -0,0 +1,148 @@
+#serializers.py
+
+import json
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from flask import Response, stream_with_context
+from models import db, User, Product, Category, Order, OrderItem, Invoice
+from instrumentation import record_serialization
+
+try:
+    import orjson  # Optional fast encoder; the stdlib fallback writes the same JSON
+except ImportError:
+    orjson = None
+
+# Rows per fetch/encode step when streaming a large array
+STREAM_CHUNK_SIZE = 1000
+
+
+def _default(value):
+    # Only reached by the stdlib encoder; orjson handles datetimes natively
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False, default=_default)
+
+
+def dumps(obj):
+    """Encode ``obj`` as compact UTF-8 JSON bytes."""
+    start = time.perf_counter()
+    try:
+        if orjson is not None:
+            return orjson.dumps(obj, default=_default)
+        return _encoder.encode(obj).encode()
+    finally:
+        record_serialization(time.perf_counter() - start)
+
+
+def enum_name(value):
+    return value.name
+
+
+def enum_value(value):
+    return value.value
+
+
+def _converter_for(column):
+    # Types the encoder can't take as-is are converted the same way the to_dict methods do
+    if isinstance(column.type, db.Enum):
+        return enum_value
+    if isinstance(column.type, db.Numeric) and column.type.asdecimal:
+        return str
+    return None
+
+
+class RowSchema:
+    """Schema-driven serializer that works on result rows instead of ORM objects.
+
+    ``fields`` are column attributes, or ``(name, column, convert)`` tuples to
+    rename a key or override how a value is converted. The schema selects exactly
+    those columns and builds each dict with one ``zip`` plus converters for the
+    few columns that need them (Decimal and Enum), producing the same JSON as the
+    model's ``to_dict`` without hydrating instances.
+    """
+
+    def __init__(self, *fields):
+        self.columns = []
+        self.keys = []
+        self._converters = []
+        for index, field in enumerate(fields):
+            if isinstance(field, tuple):
+                name, column, convert = field
+            else:
+                name, column, convert = field.key, field, _converter_for(field)
+            self.keys.append(name)
+            self.columns.append(column)
+            if convert is not None:
+                self._converters.append((index, convert))
+        self.keys = tuple(self.keys)
+
+    def select(self):
+        return db.select(*self.columns)
+
+    def query(self):
+        return db.session.query(*self.columns)
+
+    def row(self, row):
+        if not self._converters:
+            return dict(zip(self.keys, row))
+        values = list(row)
+        for index, convert in self._converters:
+            if values[index] is not None:
+                values[index] = convert(values[index])
+        return dict(zip(self.keys, values))
+
+    def dump(self, rows):
+        return [self.row(row) for row in rows]
+
+
+user_schema = RowSchema(
+    User.id, User.first_name, User.last_name, User.email,
+    ('role', User.role, enum_name),  # User.to_dict exposes the role's name
+    User.created_at, User.updated_at,
+)
+product_schema = RowSchema(
+    Product.id, Product.name, Product.description, Product.price, Product.stock,
+    Product.category_id, Product.image_url, Product.created_at, Product.updated_at,
+)
+category_schema = RowSchema(Category.id, Category.name, Category.description)
+order_schema = RowSchema(
+    Order.id, Order.user_id, Order.total_price, Order.status, Order.created_at, Order.updated_at,
+)
+order_item_schema = RowSchema(
+    OrderItem.id, OrderItem.order_id, OrderItem.product_id, OrderItem.quantity, OrderItem.price,
+)
+invoice_schema = RowSchema(
+    Invoice.id, Invoice.order_id, Invoice.billing_address, Invoice.total_amount, Invoice.created_at,
+)
+
+
+def json_response(data, status=200):
+    return Response(dumps(data), status=status, mimetype='application/json')
+
+
+def stream_rows(schema, statement, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream every row of ``statement`` as one JSON array with bounded memory.
+
+    Rows are fetched ``chunk_size`` at a time with ``yield_per`` and each chunk is
+    encoded in a single call, so neither the result set nor the body is ever held
+    in full.
+    """
+    def generate():
+        result = db.session.execute(statement.execution_options(yield_per=chunk_size))
+        yield b'['
+        separator = b''
+        for partition in result.partitions():
+            yield separator + dumps(schema.dump(partition))[1:-1]  # Strip the chunk's own brackets
+            separator = b','
+        yield b']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,100 @@
+#sqlite_tuning.py
+
+import json
+import logging
+import click
+from sqlalchemy import event
+from models import db
+
+logger = logging.getLogger(__name__)
+
+# Pragmas applied to every new connection. "default" leaves SQLite's own
+# settings alone apart from a busy timeout; "safe" adds WAL but keeps full
+# fsyncs; "performance" trades durability of the last commits on power loss
+# (never corruption) for far fewer fsyncs and a larger page cache.
+PROFILES = {
+    'default': {
+        'busy_timeout': 5000,
+    },
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # Negative values are KiB: 64 MiB
+        'temp_store': 'MEMORY',
+    },
+}
+
+REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store')
+
+
+def resolve_pragmas(app):
+    profile = app.config['SQLITE_PROFILE']
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE {profile!r}; choose from {', '.join(PROFILES)}")
+    return {**PROFILES[profile], **app.config['SQLITE_PRAGMAS']}
+
+
+def _install(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def effective_pragmas(engine):
+    """Read back the pragmas a pooled connection is actually running with."""
+    with engine.connect() as connection:
+        raw = connection.connection.dbapi_connection
+        return {name: raw.execute(f'PRAGMA {name}').fetchone()[0] for name in REPORTED_PRAGMAS}
+
+
+def apply_sqlite_profile(app):
+    """Register the configured pragma profile on every SQLite engine of ``app``.
+
+    ``SQLITE_PROFILE`` picks one of ``PROFILES`` and ``SQLITE_PRAGMAS`` overrides
+    individual pragmas. The effective values are logged once at startup and kept
+    in ``app.extensions['sqlite_pragmas']``.
+    """
+    app.config.setdefault('SQLITE_PROFILE', 'performance')
+    app.config.setdefault('SQLITE_PRAGMAS', {})
+    pragmas = resolve_pragmas(app)
+
+    report = {}
+    with app.app_context():
+        # The writer goes first: it creates the file and switches it to WAL
+        # before any read-only connection opens it
+        for bind_key, engine in sorted(db.engines.items(), key=lambda item: item[0] is not None):
+            if engine.dialect.name != 'sqlite':
+                continue
+            if engine.url.query.get('mode') == 'ro':
+                # journal_mode is persistent and can't be changed by a reader
+                _install(engine, {k: v for k, v in pragmas.items() if k != 'journal_mode'})
+            else:
+                _install(engine, pragmas)
+            report[bind_key] = effective_pragmas(engine)
+            logger.info("SQLite profile %r on %s: %s", app.config['SQLITE_PROFILE'],
+                        engine.url.render_as_string(hide_password=True), report[bind_key])
+            if engine.url.database not in (None, '', ':memory:'):
+                # Don't leave the connection used for the report in the pool: with
+                # gunicorn --preload it would be inherited by every forked worker.
+                # An in-memory database lives only as long as its one connection
+                engine.dispose()
+    app.extensions['sqlite_pragmas'] = report
+
+    @app.cli.command('sqlite-pragmas')
+    def show_sqlite_pragmas():
+        """Print the effective SQLite pragmas per database bind."""
+        click.echo(json.dumps({key or 'default': value for key, value in report.items()}, indent=2))
+
+    return report
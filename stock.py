@@ -0,0 +1,41 @@
+#stock.py
+
+from collections import Counter
+from models import db, Product
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        super().__init__("Insufficient stock")
+        self.shortages = shortages  # [{'product_id', 'requested', 'available'}, ...]
+
+
+def reserve_stock(lines):
+    """Decrement stock for every ``(product_id, quantity)`` line in the current transaction.
+
+    All lines are reserved with one guarded ``UPDATE ... WHERE stock >= quantity``
+    statement, so concurrent checkouts can never take stock below zero and no row
+    is read before it is written. The caller owns the transaction: on
+    ``InsufficientStock`` it must roll back to release the rows that did fit.
+    """
+    requested = Counter()
+    for product_id, quantity in lines:
+        requested[product_id] += quantity
+
+    quantity = db.case(dict(requested), value=Product.id)
+    stmt = (
+        db.update(Product)
+        .where(Product.id.in_(requested.keys()), Product.stock >= quantity)
+        .values(stock=Product.stock - quantity)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
+    reserved = set(db.session.execute(stmt).scalars())
+
+    short = sorted(set(requested) - reserved)
+    if short:
+        available = dict(db.session.query(Product.id, Product.stock).filter(Product.id.in_(short)).all())
+        raise InsufficientStock([
+            {'product_id': product_id, 'requested': requested[product_id], 'available': available.get(product_id, 0)}
+            for product_id in short
+        ])